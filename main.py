@@ -6,6 +6,12 @@ import sys
 from pathlib import Path
 from loguru import logger
 
+try:
+    # Line editing/history for input() (not available on Windows)
+    import readline  # noqa: F401
+except ImportError:
+    pass
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
@@ -14,9 +20,36 @@ from database import Database, SongStatus
 from orchestrator import TrendingOrchestrator
 from processor import KaraokeProcessor
 
+# Emoji shown next to each song status in the stats listing
+_STATUS_EMOJI = {
+    SongStatus.PENDING: "⏳",
+    SongStatus.DOWNLOADING: "⬇️",
+    SongStatus.SEPARATING: "🔀",
+    SongStatus.TRANSCRIBING: "📝",
+    SongStatus.GENERATING_VIDEO: "🎬",
+    SongStatus.UPLOADING: "⬆️",
+    SongStatus.COMPLETED: "✅",
+    SongStatus.FAILED: "❌"
+}
+
+# Main menu, printed before every prompt
+_MENU_BANNER = "\n".join([
+    "\n" + "="*60,
+    "🎤 KARAOKE AUTOMATION SYSTEM",
+    "="*60,
+    "\n1. 🔍 Search for trending songs",
+    "2. 🎵 Process a specific YouTube URL",
+    "3. 📋 Process pending songs",
+    "4. 📊 Show database stats",
+    "5. 🗑️  Clear failed songs",
+    "0. ❌ Exit",
+    "",
+])
+
 
 def main():
     """Main function"""
+    db = None
     try:
         # Load configuration
         config = load_config()
@@ -31,25 +64,9 @@ def main():
         # Initialize database
         db = Database(config['paths']['database'])
         
-        # Print stats
-        stats = db.get_stats()
-        logger.info(f"Database stats: {stats['total']} total songs")
-        if stats['by_status']:
-            for status, count in stats['by_status'].items():
-                logger.info(f"  {status}: {count}")
-        
-        # Main menu
+        # Main menu (stats are only computed when option 4 is selected)
         while True:
-            print("\n" + "="*60)
-            print("🎤 KARAOKE AUTOMATION SYSTEM")
-            print("="*60)
-            print("\n1. 🔍 Search for trending songs")
-            print("2. 🎵 Process a specific YouTube URL")
-            print("3. 📋 Process pending songs")
-            print("4. 📊 Show database stats")
-            print("5. 🗑️  Clear failed songs")
-            print("0. ❌ Exit")
-            print()
+            print(_MENU_BANNER)
             
             choice = input("Select option: ").strip()
             
@@ -74,6 +91,9 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         raise
+    finally:
+        if db is not None:
+            db.close()
 
 
 def search_trending(config, db):
@@ -94,13 +114,15 @@ def search_trending(config, db):
         print("🔥 TOP TRENDING SONGS IN SPAIN")
         print("="*70 + "\n")
         
+        # Check which songs are already in database (single query)
+        existing_ids = db.existing_youtube_ids([song['youtube_id'] for song in trending_songs])
+        
         # Show trending songs with details
         for i, song in enumerate(trending_songs[:10], 1):
             views = song.get('view_count', 0)
             views_str = f"{views:,}" if views else "N/A"
             
-            # Check if already in database
-            exists = db.song_exists(song['youtube_id'])
+            exists = song['youtube_id'] in existing_ids
             status = "✓ In DB" if exists else "New"
             
             print(f"{i:2d}. [{status:6}] {song['title'][:45]:<45}")
@@ -117,17 +139,12 @@ def search_trending(config, db):
         choice = input("Select option: ").strip()
         
         if choice == '1':
-            # Add all new songs to database
-            new_count = 0
-            for song in trending_songs:
-                if not db.song_exists(song['youtube_id']):
-                    db.add_song(
-                        youtube_id=song['youtube_id'],
-                        title=song['title'],
-                        url=song['url'],
-                        artist=song['artist']
-                    )
-                    new_count += 1
+            # Add all new songs to database (existing ones are skipped)
+            new_count = db.add_songs_bulk([
+                (song['youtube_id'], song['title'], song['artist'], song['url'])
+                for song in trending_songs
+                if song['youtube_id'] not in existing_ids
+            ])
             
             print(f"\n✅ Added {new_count} new songs to database")
             print(f"   Use option 3 (Process pending songs) to process them")
@@ -143,7 +160,7 @@ def search_trending(config, db):
                     selected = trending_songs[idx]
                     
                     # Add to database if not exists
-                    if not db.song_exists(selected['youtube_id']):
+                    if selected['youtube_id'] not in existing_ids:
                         db.add_song(
                             youtube_id=selected['youtube_id'],
                             title=selected['title'],
@@ -155,8 +172,8 @@ def search_trending(config, db):
                     print("\n🎵 Starting processing...\n")
                     
                     # Process immediately
-                    processor = KaraokeProcessor(config, db)
-                    success = processor.process_song(selected['youtube_id'])
+                    with KaraokeProcessor(config, db) as processor:
+                        success = processor.process_song(selected['youtube_id'])
                     
                     if success:
                         song = db.get_song_by_youtube_id(selected['youtube_id'])
@@ -239,9 +256,8 @@ def process_url(config, db):
         
         # Process the song
         print("\n🎵 Starting processing...")
-        processor = KaraokeProcessor(config, db)
-        
-        success = processor.process_song(youtube_id)
+        with KaraokeProcessor(config, db) as processor:
+            success = processor.process_song(youtube_id)
         
         if success:
             print("\n✅ Processing completed successfully!")
@@ -263,30 +279,37 @@ def process_url(config, db):
 def process_pending(config, db):
     """Process all pending songs"""
     try:
-        pending_songs = db.get_songs_by_status(SongStatus.PENDING)
+        pending_count = db.get_stats()['by_status'].get(SongStatus.PENDING, 0)
         
-        if not pending_songs:
+        if not pending_count:
             print("\n📭 No pending songs to process")
             return
         
-        print(f"\n📋 Found {len(pending_songs)} pending songs")
+        print(f"\n📋 Found {pending_count} pending songs")
         
-        for i, song in enumerate(pending_songs, 1):
-            print(f"\n[{i}/{len(pending_songs)}] Processing: {song['title']} - {song['artist']}")
-            
-            processor = KaraokeProcessor(config, db)
-            success = processor.process_song(song['youtube_id'])
+        # Single processor for the whole batch (models are loaded once)
+        # (closing it waits for renders still running in the background)
+        with KaraokeProcessor(config, db) as processor:
+            songs = {song['youtube_id']: song for song in db.iter_songs_by_status(SongStatus.PENDING)}
+            results = processor.process_batch(list(songs))
             
-            if success:
-                print(f"  ✅ Success")
-            else:
-                print(f"  ❌ Failed")
+            # Failures are reported as soon as they happen, so songs may finish out of order
+            for i, (youtube_id, success) in enumerate(results, 1):
+                song = songs[youtube_id]
+                print(f"\n[{i}/{pending_count}] Processed: {song['title']} - {song['artist']}")
                 
-                # Ask if should continue
-                if i < len(pending_songs):
-                    cont = input("\nContinue with next song? (y/n): ").strip().lower()
-                    if cont != 'y':
-                        break
+                if success:
+                    print(f"  ✅ Success")
+                else:
+                    print(f"  ❌ Failed")
+                    
+                    # Ask if should continue
+                    if i < pending_count:
+                        cont = input("\nContinue with next song? (y/n): ").strip().lower()
+                        if cont != 'y':
+                            # Stops the batch: songs still rendering are kept locally, not uploaded
+                            results.close()
+                            break
         
         print("\n✅ Batch processing completed")
     
@@ -317,16 +340,7 @@ def show_stats(db):
         
         recent = db.get_all_songs(limit=10)
         for song in recent:
-            status_emoji = {
-                SongStatus.PENDING: "⏳",
-                SongStatus.DOWNLOADING: "⬇️",
-                SongStatus.SEPARATING: "🔀",
-                SongStatus.TRANSCRIBING: "📝",
-                SongStatus.GENERATING_VIDEO: "🎬",
-                SongStatus.UPLOADING: "⬆️",
-                SongStatus.COMPLETED: "✅",
-                SongStatus.FAILED: "❌"
-            }.get(song['status'], "❓")
+            status_emoji = _STATUS_EMOJI.get(song['status'], "❓")
             
             print(f"{status_emoji} {song['title']:40s} - {song['artist']:20s} [{song['status']}]")
     
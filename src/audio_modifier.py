@@ -3,19 +3,41 @@ Audio Modifier - Apply subtle modifications to instrumental audio
 to differentiate from original (helps avoid Content ID matches)
 """
 
+from fractions import Fraction
 from pathlib import Path
 from typing import Dict
-from pydub import AudioSegment
-from pydub.effects import speedup, normalize
+import librosa
+import numpy as np
+import soundfile as sf
+from scipy.signal import butter, resample_poly, sosfiltfilt
 from loguru import logger
 import random
 
 
 class AudioModifier:
+    # Demucs/Spleeter write 44.1 kHz stems, so precompute the filter for that rate
+    DEFAULT_SAMPLE_RATE = 44100
+    
+    # Bytes per sample for the soundfile subtypes we expect to see
+    SAMPLE_WIDTHS = {
+        'PCM_S8': 1, 'PCM_U8': 1, 'PCM_16': 2, 'PCM_24': 3,
+        'PCM_32': 4, 'FLOAT': 4, 'DOUBLE': 8,
+    }
+    
     def __init__(self, config: Dict):
         self.config = config
         self.mod_config = config['audio']['modification']
         self.enabled = self.mod_config.get('enabled', True)
+        
+        # Gentle low-pass (slight high-frequency rolloff)
+        self.filter_cutoff_hz = self.mod_config.get('filter_cutoff_hz', 16000)
+        # Filter coefficients per sample rate, designed once
+        self._sos_cache = {
+            self.DEFAULT_SAMPLE_RATE: self._design_filter(self.DEFAULT_SAMPLE_RATE)
+        }
+        
+        # Peak level after normalization (0.1 dB headroom)
+        self.target_dbfs = -0.1
     
     def modify_instrumental(self, input_path: str, output_path: str) -> str:
         """
@@ -41,19 +63,15 @@ class AudioModifier:
         try:
             logger.info(f"Modifying instrumental: {Path(input_path).name}")
             
-            # Load audio
-            audio = AudioSegment.from_file(input_path)
+            # Load audio as float32 array of shape (samples, channels)
+            audio, sample_rate = sf.read(input_path, dtype='float32', always_2d=True)
             
             # Apply modifications
-            modified_audio = self._apply_modifications(audio)
+            modified_audio = self._apply_modifications(audio, sample_rate)
             
             # Export modified audio
             output_path = str(output_path)
-            modified_audio.export(
-                output_path,
-                format='wav',
-                parameters=["-q:a", "0"]  # Highest quality
-            )
+            self._write_audio(output_path, modified_audio, sample_rate)
             
             logger.info(f"Modified instrumental saved: {Path(output_path).name}")
             return output_path
@@ -63,7 +81,7 @@ class AudioModifier:
             logger.warning("Falling back to original instrumental")
             return input_path
     
-    def _apply_modifications(self, audio: AudioSegment) -> AudioSegment:
+    def _apply_modifications(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
         """Apply a combination of subtle audio modifications"""
         
         # 1. Tempo change (subtle speed up/down)
@@ -74,9 +92,9 @@ class AudioModifier:
             factor = max(0.97, min(1.03, factor))  # Clamp between 97% and 103%
             
             logger.debug(f"Applying tempo change: {factor:.3f}x")
-            audio = speedup(audio, playback_speed=factor)
+            audio = self._time_stretch(audio, factor)
         
-        # 2. Pitch shift (using frame rate manipulation - subtle)
+        # 2. Pitch shift (same as changing the frame rate and resampling back)
         pitch_shift = self.mod_config.get('pitch_shift_semitones', 0.5)
         if pitch_shift > 0:
             # Random direction
@@ -84,74 +102,103 @@ class AudioModifier:
             semitones = max(-1, min(1, semitones))  # Clamp to ±1 semitone
             
             logger.debug(f"Applying pitch shift: {semitones:+.2f} semitones")
-            audio = self._pitch_shift(audio, semitones)
+            # Each semitone is a factor of 2^(1/12), applied as a playback speed change
+            audio = self._change_speed(audio, 2 ** (semitones / 12))
         
         # 3. Apply subtle filter (optional)
         if self.mod_config.get('apply_filter', True):
-            audio = self._apply_subtle_filter(audio)
+            audio = self._apply_subtle_filter(audio, sample_rate)
         
         # 4. Normalize volume
-        audio = normalize(audio, headroom=0.1)
+        audio = self._normalize(audio)
         
         return audio
     
-    def _pitch_shift(self, audio: AudioSegment, semitones: float) -> AudioSegment:
+    def _change_speed(self, audio: np.ndarray, speed: float) -> np.ndarray:
         """
-        Shift pitch by changing sample rate
-        Note: This is a simple method. For better quality, consider using librosa
+        Change playback speed with a single polyphase resampling pass
+        Output keeps the original sample rate, so pitch and tempo both change
         """
-        # Calculate new frame rate
-        # Each semitone is a factor of 2^(1/12)
-        factor = 2 ** (semitones / 12)
-        
-        new_sample_rate = int(audio.frame_rate * factor)
-        
-        # Change frame rate (this changes pitch)
-        pitched = audio._spawn(audio.raw_data, overrides={
-            'frame_rate': new_sample_rate
-        })
+        ratio = Fraction(1 / speed).limit_denominator(1000)
+        resampled = resample_poly(audio, ratio.numerator, ratio.denominator, axis=0)
+        return resampled.astype(np.float32, copy=False)
+    
+    def _time_stretch(self, audio: np.ndarray, rate: float) -> np.ndarray:
+        """Change tempo without changing pitch using librosa's phase vocoder"""
+        # librosa expects channels first: (channels, samples)
+        stretched = librosa.effects.time_stretch(audio.T, rate=rate)
+        return np.ascontiguousarray(stretched.T, dtype=np.float32)
+    
+    def _design_filter(self, sample_rate: int) -> np.ndarray:
+        """
+        Design the 2nd order Butterworth low-pass as second-order sections
         
-        # Convert back to original frame rate (to keep tempo)
-        return pitched.set_frame_rate(audio.frame_rate)
+        The cutoff is kept below Nyquist, so low sample rates still get the filter.
+        """
+        cutoff_hz = min(self.filter_cutoff_hz, 0.45 * sample_rate)
+        return butter(2, cutoff_hz, btype='low', output='sos', fs=sample_rate)
     
-    def _apply_subtle_filter(self, audio: AudioSegment) -> AudioSegment:
+    def _apply_subtle_filter(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
         """
         Apply a very subtle filter to slightly color the audio
-        This can be a gentle low-pass or high-pass filter
+        Gentle low-pass that simulates a slight "warmth" or analog quality
         """
-        # Apply gentle low-pass filter (removes very high frequencies)
-        # This simulates a slight "warmth" or analog quality
-        
-        # For more sophisticated filtering, we'd need librosa or scipy
-        # For now, we use a simple approach: slight high-frequency rolloff
+        sos = self._sos_cache.get(sample_rate)
+        if sos is None:
+            sos = self._sos_cache[sample_rate] = self._design_filter(sample_rate)
         
-        # Apply gentle compression using gain
-        compressed = audio.apply_gain(-1)  # Reduce volume slightly
-        compressed = normalize(compressed)  # Then normalize back
-        
-        # Mix with original (subtle effect)
-        mixed = audio.overlay(compressed - 6)  # 6dB quieter overlay
-        
-        return mixed
+        # Zero-phase (forward-backward) filtering needs the whole signal;
+        # the result is copied back into the float32 buffer
+        audio[:] = sosfiltfilt(sos, audio, axis=0)
+        return audio
+    
+    def _normalize(self, audio: np.ndarray) -> np.ndarray:
+        """Scale audio in place so its peak sits at the target level"""
+        peak = float(np.max(np.abs(audio))) if audio.size else 0.0
+        if peak == 0.0:
+            return audio
+        
+        gain = 10 ** (self.target_dbfs / 20) / peak
+        np.multiply(audio, gain, out=audio)
+        np.clip(audio, -1.0, 1.0, out=audio)
+        return audio
     
-    def analyze_audio(self, audio_path: str) -> Dict:
+    def _write_audio(self, output_path: str, audio: np.ndarray, sample_rate: int):
+        """Write float32 audio as 16-bit PCM WAV"""
+        sf.write(output_path, audio, sample_rate, subtype='PCM_16')
+    
+    def analyze_audio(self, audio_path: str, full: bool = False) -> Dict:
         """
         Analyze audio file properties
         Useful for debugging and verification
+        
+        Args:
+            audio_path: Path to audio file
+            full: Also decode the samples to compute rms/dBFS/max_dBFS
+                  (otherwise only the header is read)
         """
         try:
-            audio = AudioSegment.from_file(audio_path)
+            info = sf.info(audio_path)
+            sample_width = self.SAMPLE_WIDTHS.get(info.subtype)
             
-            return {
-                'duration_seconds': len(audio) / 1000,
-                'frame_rate': audio.frame_rate,
-                'channels': audio.channels,
-                'sample_width': audio.sample_width,
-                'frame_width': audio.frame_width,
-                'rms': audio.rms,
-                'dBFS': audio.dBFS,
-                'max_dBFS': audio.max_dBFS,
+            result = {
+                'duration_seconds': info.duration,
+                'frame_rate': info.samplerate,
+                'channels': info.channels,
+                'sample_width': sample_width,
+                'frame_width': sample_width * info.channels if sample_width else None,
             }
+            
+            if full:
+                audio, _ = sf.read(audio_path, dtype='float32')
+                rms = float(np.sqrt(np.mean(np.square(audio)))) if audio.size else 0.0
+                peak = float(np.max(np.abs(audio))) if audio.size else 0.0
+                
+                result['rms'] = rms
+                result['dBFS'] = float(20 * np.log10(rms)) if rms > 0 else float('-inf')
+                result['max_dBFS'] = float(20 * np.log10(peak)) if peak > 0 else float('-inf')
+            
+            return result
         except Exception as e:
             logger.error(f"Error analyzing audio: {e}")
             return {}
@@ -175,10 +222,10 @@ if __name__ == "__main__":
     #     
     #     # Analyze both files
     #     print("\nOriginal audio:")
-    #     print(modifier.analyze_audio(input_file))
+    #     print(modifier.analyze_audio(input_file, full=True))
     #     
     #     print("\nModified audio:")
-    #     print(modifier.analyze_audio(modified))
+    #     print(modifier.analyze_audio(modified, full=True))
     # else:
     #     print(f"Test file not found: {input_file}")
     
@@ -4,31 +4,80 @@ Uses SQLite to store song metadata and processing status
 """
 
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Set
 from contextlib import contextmanager
 
 
 class Database:
+    """
+    SQLite store for songs and their processing status
+    
+    Song lookups return sqlite3.Row objects rather than dicts: they support
+    row['column'] access and iteration, but not dict methods such as .get();
+    wrap them with dict(row) where a real dict is needed.
+    """
+    
+    # Columns that update_paths/update_status accept as keyword arguments
+    PATH_FIELDS = frozenset({
+        'download_path', 'vocal_path', 'instrumental_path',
+        'modified_instrumental_path', 'lyrics_path', 'video_path',
+        'youtube_upload_id'
+    })
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Single connection reused by every call (autocommit mode,
+        # transactions are opened explicitly in get_connection)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA mmap_size=268435456")
+        
+        # Cached get_stats() result, cleared by any call that adds songs or changes status
+        self._stats_cache = None
+        
         self._init_db()
     
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
+    def get_connection(self, changes_stats: bool = False):
+        """
+        Context manager yielding the shared connection inside a transaction
+        
+        With changes_stats the cached get_stats() result is dropped once the
+        write has committed, still under the lock, so it can't be re-cached stale.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+                if changes_stats:
+                    self._stats_cache = None
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def close(self):
+        """Close the shared database connection"""
+        conn = getattr(self, '_conn', None)
+        if conn is not None:
             conn.close()
+            self._conn = None
+    
+    def __del__(self):
+        self.close()
     
     def _init_db(self):
         """Initialize database schema"""
@@ -60,52 +109,108 @@ class Database:
                 ON songs(youtube_id)
             """)
             
+            # Serve status filters and recency ordering straight from the index
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_status_created 
+                ON songs(status, created_at DESC)
+            """)
+            
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_status 
-                ON songs(status)
+                CREATE INDEX IF NOT EXISTS idx_created 
+                ON songs(created_at DESC)
             """)
+            
+            # Superseded by idx_status_created
+            conn.execute("DROP INDEX IF EXISTS idx_status")
     
-    def add_song(self, youtube_id: str, title: str, url: str, artist: Optional[str] = None) -> int:
-        """Add a new song to the database"""
-        with self.get_connection() as conn:
+    def add_song(self, youtube_id: str, title: str, url: str, artist: Optional[str] = None) -> Optional[int]:
+        """Add a new song to the database (returns None if it already exists)"""
+        with self.get_connection(changes_stats=True) as conn:
             cursor = conn.execute("""
-                INSERT INTO songs (youtube_id, title, artist, url, status)
+                INSERT OR IGNORE INTO songs (youtube_id, title, artist, url, status)
                 VALUES (?, ?, ?, ?, 'pending')
             """, (youtube_id, title, artist, url))
-            return cursor.lastrowid
+            # No row inserted means the song was already there
+            return cursor.lastrowid if cursor.rowcount else None
     
-    def get_song_by_youtube_id(self, youtube_id: str) -> Optional[Dict]:
+    def add_songs_bulk(self, rows: List[tuple]) -> int:
+        """
+        Add several songs in a single transaction
+        
+        Args:
+            rows: Tuples of (youtube_id, title, artist, url)
+        
+        Returns:
+            Number of songs actually inserted (existing ones are skipped)
+        """
+        if not rows:
+            return 0
+        
+        with self.get_connection(changes_stats=True) as conn:
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO songs (youtube_id, title, artist, url, status)
+                VALUES (?, ?, ?, ?, 'pending')
+            """, rows)
+            return cursor.rowcount
+    
+    def get_song_by_youtube_id(self, youtube_id: str) -> Optional[sqlite3.Row]:
         """Get song by YouTube ID"""
         with self.get_connection() as conn:
-            result = conn.execute("""
+            return conn.execute("""
                 SELECT * FROM songs WHERE youtube_id = ?
             """, (youtube_id,)).fetchone()
-            return dict(result) if result else None
     
     def song_exists(self, youtube_id: str) -> bool:
         """Check if song already exists in database"""
-        return self.get_song_by_youtube_id(youtube_id) is not None
+        with self.get_connection() as conn:
+            result = conn.execute("""
+                SELECT 1 FROM songs WHERE youtube_id = ? LIMIT 1
+            """, (youtube_id,)).fetchone()
+            return result is not None
     
-    def update_status(self, youtube_id: str, status: str, error_message: Optional[str] = None):
-        """Update song processing status"""
+    def existing_youtube_ids(self, youtube_ids: List[str]) -> Set[str]:
+        """Return the subset of the given YouTube IDs already in the database"""
+        existing = set()
+        if not youtube_ids:
+            return existing
+        
+        # Stay well below SQLite's bound-parameter limit
+        chunk_size = 500
+        
         with self.get_connection() as conn:
-            conn.execute("""
+            for start in range(0, len(youtube_ids), chunk_size):
+                chunk = youtube_ids[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                results = conn.execute(f"""
+                    SELECT youtube_id FROM songs WHERE youtube_id IN ({placeholders})
+                """, chunk).fetchall()
+                existing.update(row[0] for row in results)
+        
+        return existing
+    
+    def update_status(self, youtube_id: str, status: str, error_message: Optional[str] = None, **paths):
+        """
+        Update song processing status
+        
+        Paths passed as keyword arguments (see update_paths) are written in the
+        same UPDATE, so a step's outputs and the next status cost one write.
+        """
+        updates = {k: v for k, v in paths.items() if k in self.PATH_FIELDS}
+        set_clause = "".join(f", {k} = ?" for k in updates.keys())
+        values = [status, error_message, *updates.values(), youtube_id]
+        
+        with self.get_connection(changes_stats=True) as conn:
+            conn.execute(f"""
                 UPDATE songs 
                 SET status = ?, 
                     updated_at = CURRENT_TIMESTAMP,
-                    error_message = ?
+                    error_message = ?{set_clause}
                 WHERE youtube_id = ?
-            """, (status, error_message, youtube_id))
+            """, values)
     
     def update_paths(self, youtube_id: str, **paths):
         """Update file paths for a song"""
-        valid_fields = {
-            'download_path', 'vocal_path', 'instrumental_path',
-            'modified_instrumental_path', 'lyrics_path', 'video_path',
-            'youtube_upload_id'
-        }
-        
-        updates = {k: v for k, v in paths.items() if k in valid_fields}
+        updates = {k: v for k, v in paths.items() if k in self.PATH_FIELDS}
         if not updates:
             return
         
@@ -119,28 +224,47 @@ class Database:
                 WHERE youtube_id = ?
             """, values)
     
-    def get_songs_by_status(self, status: str) -> List[Dict]:
+    def get_songs_by_status(self, status: str) -> List[sqlite3.Row]:
         """Get all songs with a specific status"""
         with self.get_connection() as conn:
-            results = conn.execute("""
+            return conn.execute("""
                 SELECT * FROM songs WHERE status = ?
                 ORDER BY created_at DESC
             """, (status,)).fetchall()
-            return [dict(row) for row in results]
     
-    def get_all_songs(self, limit: Optional[int] = None) -> List[Dict]:
-        """Get all songs, optionally limited"""
-        query = "SELECT * FROM songs ORDER BY created_at DESC"
-        if limit:
-            query += f" LIMIT {limit}"
+    def iter_songs_by_status(
+        self,
+        status: str,
+        columns: tuple = ('youtube_id', 'title', 'artist')
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Iterate songs with a specific status, fetching only the given columns
         
+        Rows are read before the first yield so the shared connection is free
+        while the caller works on each song.
+        """
         with self.get_connection() as conn:
-            results = conn.execute(query).fetchall()
-            return [dict(row) for row in results]
+            results = conn.execute(f"""
+                SELECT {', '.join(columns)} FROM songs WHERE status = ?
+                ORDER BY created_at DESC
+            """, (status,)).fetchall()
+        
+        yield from results
+    
+    def get_all_songs(self, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        """Get all songs, optionally limited"""
+        # Always bind LIMIT so the statement is cached once (-1 means no limit)
+        with self.get_connection() as conn:
+            return conn.execute("""
+                SELECT * FROM songs ORDER BY created_at DESC LIMIT ?
+            """, (limit if limit else -1,)).fetchall()
     
     def get_stats(self) -> Dict:
-        """Get database statistics"""
+        """Get database statistics (cached until songs are added or change status)"""
         with self.get_connection() as conn:
+            if self._stats_cache is not None:
+                return self._copy_stats(self._stats_cache)
+            
             stats = {}
             
             # Total songs
@@ -156,8 +280,14 @@ class Database:
             """).fetchall()
             
             stats['by_status'] = {row[0]: row[1] for row in status_counts}
-            
-            return stats
+            self._stats_cache = stats
+        
+        return self._copy_stats(stats)
+    
+    @staticmethod
+    def _copy_stats(stats: Dict) -> Dict:
+        """Copy of a stats dict, so callers can't modify the cached one"""
+        return {'total': stats['total'], 'by_status': dict(stats['by_status'])}
 
 
 # Status constants
@@ -1,19 +1,41 @@
 """
-Lyrics Generator - Convert SRT subtitles to ASS format with karaoke styling
+Lyrics Generator - Convert Whisper segments or SRT subtitles to ASS format with karaoke styling
 Creates visually appealing lyrics with word-by-word highlighting
 """
 
-import re
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 from loguru import logger
 
+try:
+    # Optional: JIT-compile the bulk timing arithmetic
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _times_to_seconds(hours, minutes, seconds, milliseconds):
+    """Convert arrays of time components to total seconds"""
+    return hours * 3600.0 + minutes * 60.0 + seconds + milliseconds / 1000.0
+
+
+if njit is not None:
+    _times_to_seconds = njit(cache=True)(_times_to_seconds)
+
 
 class LyricsGenerator:
     def __init__(self, config: Dict):
         self.config = config
         self.lyrics_config = config['video']['lyrics']
         self.video_config = config['video']
+        
+        # Styling does not change between files, so build these once
+        self._ass_header = self._build_ass_header()
+        fade_in = self.lyrics_config.get('fade_in_ms', 200)
+        fade_out = self.lyrics_config.get('fade_out_ms', 200)
+        self._fade_tag = f"{{\\fad({fade_in},{fade_out})}}"
     
     def srt_to_ass_karaoke(self, srt_path: str, output_path: str) -> str:
         """
@@ -27,91 +49,157 @@ class LyricsGenerator:
             Path to created ASS file
         """
         try:
-            logger.info(f"Converting SRT to ASS karaoke: {Path(srt_path).name}")
+            logger.info("Converting SRT to ASS karaoke: {}", Path(srt_path).name)
             
             # Parse SRT file
-            subtitles = self._parse_srt(srt_path)
+            starts, ends, texts = self._parse_srt(srt_path)
             
-            if not subtitles:
+            if not texts:
                 raise ValueError("No subtitles found in SRT file")
             
             # Generate ASS content
-            ass_content = self._generate_ass_content(subtitles)
+            ass_content = self._generate_ass_content(starts, ends, texts)
             
             # Write to file
             output_path = str(output_path)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(ass_content)
+            self._write_ass(output_path, ass_content)
             
-            logger.info(f"ASS karaoke file created: {Path(output_path).name}")
+            logger.info("ASS karaoke file created: {}", Path(output_path).name)
             return output_path
         
         except Exception as e:
             logger.error(f"Error converting SRT to ASS: {e}")
             raise
     
-    def _parse_srt(self, srt_path: str) -> List[Dict]:
-        """Parse SRT file into list of subtitle dictionaries"""
-        subtitles = []
+    def segments_to_ass_karaoke(self, segments: List, output_path: str) -> str:
+        """
+        Write Whisper segments straight to ASS format with karaoke effects
         
-        with open(srt_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        Segments transcribed with word timestamps get one \\k tag per word from
+        the real word timings; segments without words fall back to an even split.
         
-        # Split by double newline (subtitle blocks)
-        blocks = re.split(r'\n\n+', content.strip())
+        Args:
+            segments: Whisper segments (objects with start, end, text and words)
+            output_path: Path to output ASS file
         
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) < 3:
-                continue
-            
-            # Parse timing line (format: 00:00:01,000 --> 00:00:03,500)
-            timing_match = re.match(
-                r'(\d{2}):(\d{2}):(\d{2}),(\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2}),(\d{3})',
-                lines[1]
-            )
-            
-            if not timing_match:
-                continue
-            
-            start_h, start_m, start_s, start_ms, end_h, end_m, end_s, end_ms = timing_match.groups()
+        Returns:
+            Path to created ASS file
+        """
+        try:
+            if not segments:
+                raise ValueError("No segments found in transcription")
             
-            start_time = self._time_to_seconds(int(start_h), int(start_m), int(start_s), int(start_ms))
-            end_time = self._time_to_seconds(int(end_h), int(end_m), int(end_s), int(end_ms))
+            starts = np.fromiter((segment.start for segment in segments), dtype=np.float64, count=len(segments))
+            ends = np.fromiter((segment.end for segment in segments), dtype=np.float64, count=len(segments))
+            karaoke_texts = [
+                self._apply_word_karaoke(segment.words, segment.start)
+                if segment.words else
+                self._apply_karaoke_effect(segment.text.strip(), segment.start, segment.end)
+                for segment in segments
+            ]
             
-            # Get text (can be multiple lines)
-            text = ' '.join(lines[2:])
+            output_path = str(output_path)
+            self._write_ass(output_path, self._format_ass_content(starts, ends, karaoke_texts))
             
-            subtitles.append({
-                'start': start_time,
-                'end': end_time,
-                'text': text
-            })
+            logger.info("ASS karaoke file created: {}", Path(output_path).name)
+            return output_path
         
-        logger.debug(f"Parsed {len(subtitles)} subtitles from SRT")
-        return subtitles
+        except Exception as e:
+            logger.error(f"Error writing ASS from segments: {e}")
+            raise
     
-    def _time_to_seconds(self, hours: int, minutes: int, seconds: int, milliseconds: int) -> float:
-        """Convert time components to total seconds"""
-        return hours * 3600 + minutes * 60 + seconds + milliseconds / 1000
+    def _write_ass(self, output_path: str, ass_content: str):
+        """Encode ASS content to UTF-8 once and write it as bytes"""
+        data = ass_content.encode('utf-8')
+        with open(output_path, 'wb') as f:
+            f.write(data)
     
-    def _seconds_to_ass_time(self, seconds: float) -> str:
-        """Convert seconds to ASS time format (H:MM:SS.CC)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centiseconds = int((seconds % 1) * 100)
+    def _parse_srt(self, srt_path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Parse SRT file into arrays of start/end seconds and a list of texts"""
+        timings = []
+        texts = []
+        block = []
+        skip_block = False
         
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+        # Stream the file line by line; a blank line ends a subtitle block
+        # (the trailing '' flushes the last block)
+        with open(srt_path, 'r', encoding='utf-8') as f:
+            for line in chain(f, ['']):
+                line = line.strip()
+                if line:
+                    if skip_block:
+                        continue
+                    block.append(line)
+                    
+                    # Drop the block as soon as its timing line turns out malformed
+                    if len(block) == 2 and not self._is_timing_line(line):
+                        skip_block = True
+                    continue
+                
+                if block and not skip_block:
+                    parsed = self._parse_block(block)
+                    if parsed:
+                        timings.append(parsed[0])
+                        texts.append(parsed[1])
+                block = []
+                skip_block = False
+        
+        # Convert all timing fields to seconds in one vectorized call
+        fields = np.array(timings, dtype=np.int64).reshape(-1, 8)
+        starts = _times_to_seconds(fields[:, 0], fields[:, 1], fields[:, 2], fields[:, 3])
+        ends = _times_to_seconds(fields[:, 4], fields[:, 5], fields[:, 6], fields[:, 7])
+        
+        logger.debug("Parsed {} subtitles from SRT", len(texts))
+        return starts, ends, texts
     
-    def _generate_ass_content(self, subtitles: List[Dict]) -> str:
-        """Generate complete ASS file content with styling"""
+    def _is_timing_line(self, line: str) -> bool:
+        """Cheap shape check for an SRT timing line before parsing it"""
+        return len(line) >= 29 and line[2] == ':' and line[8] == ',' and line[25] == ','
+    
+    def _parse_block(self, lines: List[str]) -> Optional[Tuple[Tuple[int, ...], str]]:
+        """
+        Parse one SRT block (index, timing line, text lines)
+        
+        Returns:
+            (start h, m, s, ms, end h, m, s, ms) and the text, or None if malformed
+        """
+        if len(lines) < 3:
+            return None
+        
+        # Parse fixed-width timing line (format: 00:00:01,000 --> 00:00:03,500)
+        t = lines[1]
+        if not self._is_timing_line(t):
+            return None
+        
+        try:
+            timing = (
+                int(t[0:2]), int(t[3:5]), int(t[6:8]), int(t[9:12]),
+                int(t[17:19]), int(t[20:22]), int(t[23:25]), int(t[26:29])
+            )
+        except ValueError:
+            return None
+        
+        # Get text (can be multiple lines)
+        return timing, ' '.join(lines[2:])
+    
+    def _seconds_to_ass_times(self, seconds: np.ndarray) -> List[str]:
+        """Convert an array of seconds to ASS time format (H:MM:SS.CC)"""
+        hours = (seconds // 3600).astype(np.int64)
+        minutes = ((seconds % 3600) // 60).astype(np.int64)
+        secs = (seconds % 60).astype(np.int64)
+        centiseconds = ((seconds % 1) * 100).astype(np.int64)
         
+        return [
+            f"{h}:{m:02d}:{sec:02d}.{cs:02d}"
+            for h, m, sec, cs in zip(hours.tolist(), minutes.tolist(), secs.tolist(), centiseconds.tolist())
+        ]
+    
+    def _build_ass_header(self) -> str:
+        """Build the ASS header (script info, styles and events format)"""
         resolution = self.video_config['resolution']
         width, height = map(int, resolution.split('x'))
         
-        # ASS header
-        ass_content = f"""[Script Info]
+        return f"""[Script Info]
 Title: Karaoke Lyrics
 ScriptType: v4.00+
 PlayResX: {width}
@@ -127,19 +215,33 @@ Style: Karaoke,{self.lyrics_config['font']},{self.lyrics_config['font_size']},{s
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
+    
+    def _generate_ass_content(self, starts: np.ndarray, ends: np.ndarray, texts: List[str]) -> str:
+        """Generate complete ASS file content with styling"""
         
-        # Add subtitle events with karaoke effects
-        for sub in subtitles:
-            start_time = self._seconds_to_ass_time(sub['start'])
-            end_time = self._seconds_to_ass_time(sub['end'])
-            text = sub['text']
-            
-            # Apply karaoke effect with word-by-word highlighting
-            karaoke_text = self._apply_karaoke_effect(text, sub['start'], sub['end'])
-            
-            ass_content += f"Dialogue: 0,{start_time},{end_time},Karaoke,,0,0,0,,{karaoke_text}\n"
+        # Apply karaoke effect with word-by-word highlighting
+        karaoke_texts = (
+            self._apply_karaoke_effect(text, start, end)
+            for text, start, end in zip(texts, starts.tolist(), ends.tolist())
+        )
         
-        return ass_content
+        return self._format_ass_content(starts, ends, karaoke_texts)
+    
+    def _format_ass_content(self, starts: np.ndarray, ends: np.ndarray, karaoke_texts) -> str:
+        """Lay out the header and one Dialogue line per (already tagged) text"""
+        
+        # Format all start/end times at once
+        start_times = self._seconds_to_ass_times(starts)
+        end_times = self._seconds_to_ass_times(ends)
+        
+        # Add subtitle events after the header
+        lines = [self._ass_header]
+        lines.extend(
+            f"Dialogue: 0,{start_time},{end_time},Karaoke,,0,0,0,,{karaoke_text}\n"
+            for start_time, end_time, karaoke_text in zip(start_times, end_times, karaoke_texts)
+        )
+        
+        return ''.join(lines)
     
     def _apply_karaoke_effect(self, text: str, start_time: float, end_time: float) -> str:
         """
@@ -158,19 +260,33 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         duration_per_word = total_duration / len(words)
         duration_centiseconds = int(duration_per_word * 100)
         
-        # Build karaoke text with tags
-        fade_in = self.lyrics_config.get('fade_in_ms', 200)
-        fade_out = self.lyrics_config.get('fade_out_ms', 200)
-        
-        # Add fade effect
-        karaoke_text = f"{{\\fad({fade_in},{fade_out})}}"
+        # Build karaoke text with tags, starting with the fade effect
+        parts = [self._fade_tag]
         
         # Add word-by-word karaoke timing
+        # (\\k tag makes the word highlight for the specified duration)
+        tag = f"{{\\k{duration_centiseconds}}}"
+        parts.extend(tag + word + " " for word in words)
+        
+        return ''.join(parts).rstrip()
+    
+    def _apply_word_karaoke(self, words: List, segment_start: float) -> str:
+        """
+        Apply karaoke tags from Whisper word timestamps
+        
+        Each word is highlighted from the end of the previous word to its own end,
+        so pauses are absorbed and the highlight never drifts from the audio.
+        Durations come from rounded absolute times so rounding errors don't add up.
+        """
+        parts = [self._fade_tag]
+        boundary = round(segment_start * 100)
+        
         for word in words:
-            # \\k tag makes the word highlight for the specified duration
-            karaoke_text += f"{{\\k{duration_centiseconds}}}{word} "
+            end = round(word.end * 100)
+            parts.append(f"{{\\k{max(end - boundary, 0)}}}{word.word.strip()} ")
+            boundary = max(end, boundary)
         
-        return karaoke_text.strip()
+        return ''.join(parts).rstrip()
     
     def create_simple_ass(self, text_lines: List[str], output_path: str, 
                          duration_per_line: float = 3.0) -> str:
@@ -183,46 +299,55 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             output_path: Output ASS file path
             duration_per_line: Seconds to display each line
         """
-        subtitles = []
+        starts = []
+        ends = []
+        texts = []
         current_time = 0
         
         for line in text_lines:
             if line.strip():
-                subtitles.append({
-                    'start': current_time,
-                    'end': current_time + duration_per_line,
-                    'text': line.strip()
-                })
+                starts.append(current_time)
+                ends.append(current_time + duration_per_line)
+                texts.append(line.strip())
                 current_time += duration_per_line
         
-        ass_content = self._generate_ass_content(subtitles)
+        ass_content = self._generate_ass_content(
+            np.array(starts, dtype=np.float64),
+            np.array(ends, dtype=np.float64),
+            texts
+        )
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
+        self._write_ass(output_path, ass_content)
         
-        logger.info(f"Created simple ASS file: {Path(output_path).name}")
+        logger.info("Created simple ASS file: {}", Path(output_path).name)
         return output_path
     
     def validate_ass_file(self, ass_path: str) -> bool:
         """Validate that ASS file is properly formatted"""
         try:
+            # Required sections plus at least one dialogue line, found in a
+            # single streamed pass that stops as soon as all are seen
+            required_sections = ['[Script Info]', '[V4+ Styles]', '[Events]']
+            required = required_sections + ['Dialogue:']
+            found = set()
+            
             with open(ass_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                for line in f:
+                    for marker in required:
+                        if marker not in found and marker in line:
+                            found.add(marker)
+                    
+                    if len(found) == len(required):
+                        logger.info("ASS file validation passed")
+                        return True
             
-            # Check for required sections
-            required_sections = ['[Script Info]', '[V4+ Styles]', '[Events]']
             for section in required_sections:
-                if section not in content:
+                if section not in found:
                     logger.error(f"Missing required section: {section}")
                     return False
             
-            # Check for at least one dialogue line
-            if 'Dialogue:' not in content:
-                logger.error("No dialogue lines found in ASS file")
-                return False
-            
-            logger.info("ASS file validation passed")
-            return True
+            logger.error("No dialogue lines found in ASS file")
+            return False
         
         except Exception as e:
             logger.error(f"Error validating ASS file: {e}")
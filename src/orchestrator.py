@@ -3,17 +3,32 @@ Orchestrator - Searches for trending songs on YouTube
 """
 
 import os
+import re
 from typing import List, Dict, Optional
-from googleapiclient.discovery import build
+import httplib2
+from cachetools import TTLCache
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
+from googleapiclient.http import set_user_agent
 from loguru import logger
 from dotenv import load_dotenv
 
 from database import Database, SongStatus
-from utils import extract_youtube_id
+from utils import extract_youtube_id, get_discovery_doc
+
+# Common video title suffixes stripped before looking for the artist
+_TITLE_SUFFIX_RE = re.compile(
+    r'\((?:official (?:video|music video|audio)|lyric video|audio|vevo)\)|\[official video\]',
+    re.IGNORECASE
+)
 
 
 class TrendingOrchestrator:
+    # Recent search_by_query results, keyed by (query, region, max_results), to avoid
+    # spending API quota on repeated searches; shared because main.py builds a new
+    # orchestrator for every menu action
+    _QUERY_CACHE = TTLCache(maxsize=256, ttl=3600)
+    
     def __init__(self, config: Dict, db: Database):
         self.config = config
         self.db = db
@@ -27,22 +42,31 @@ class TrendingOrchestrator:
         if not api_key:
             raise ValueError("YouTube API key is required. Please set YOUTUBE_API_KEY in your .env file")
         
+        # Single keep-alive HTTP connection for all API calls. httplib2 already
+        # sends accept-encoding: gzip; Google only compresses responses when
+        # the user-agent also contains "gzip"
+        self._http = set_user_agent(httplib2.Http(timeout=30), 'ytb-automate (gzip)')
+        
         # Initialize YouTube API client
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = build_from_document(
+            get_discovery_doc('youtube', 'v3'),
+            developerKey=api_key,
+            http=self._http
+        )
         logger.info("YouTube API initialized")
         
         # Configuration
         self.region = config['youtube']['region']
         self.max_results = config['youtube']['max_results']
         self.category_id = str(config['youtube']['category_id'])
-    
+        
     def search_trending_songs(self) -> List[Dict]:
         """
         Search for trending music videos in the configured region
         Returns list of video info dictionaries
         """
         try:
-            logger.info(f"Searching for trending songs in region: {self.region}")
+            logger.info("Searching for trending songs in region: {}", self.region)
             
             # Use videos().list() to get popular videos in the Music category
             request = self.youtube.videos().list(
@@ -61,7 +85,7 @@ class TrendingOrchestrator:
                 if video_info:
                     trending_songs.append(video_info)
             
-            logger.info(f"Found {len(trending_songs)} trending songs")
+            logger.info("Found {} trending songs", len(trending_songs))
             return trending_songs
         
         except HttpError as e:
@@ -75,9 +99,15 @@ class TrendingOrchestrator:
         """
         Search for songs by query string
         Useful for finding specific trending songs or artists
+        Results are cached for an hour per (query, region, max_results)
         """
+        key = (query, self.region, max_results)
+        if key in self._QUERY_CACHE:
+            logger.debug("Using cached search results for: {}", query)
+            return self._QUERY_CACHE[key]
+        
         try:
-            logger.info(f"Searching YouTube for: {query}")
+            logger.info("Searching YouTube for: {}", query)
             
             request = self.youtube.search().list(
                 part='snippet',
@@ -91,23 +121,24 @@ class TrendingOrchestrator:
             
             response = request.execute()
             
+            video_ids = [item['id']['videoId'] for item in response.get('items', [])]
+            
             songs = []
-            for item in response.get('items', []):
-                video_id = item['id']['videoId']
-                
-                # Get full video details
+            if video_ids:
+                # Get full video details for all results in one request
                 video_request = self.youtube.videos().list(
                     part='snippet,contentDetails,statistics',
-                    id=video_id
+                    id=','.join(video_ids)
                 )
                 video_response = video_request.execute()
                 
-                if video_response.get('items'):
-                    video_info = self._parse_video_item(video_response['items'][0])
+                for item in video_response.get('items', []):
+                    video_info = self._parse_video_item(item)
                     if video_info:
                         songs.append(video_info)
             
-            logger.info(f"Found {len(songs)} songs matching query: {query}")
+            logger.info("Found {} songs matching query: {}", len(songs), query)
+            self._QUERY_CACHE[key] = songs
             return songs
         
         except HttpError as e:
@@ -156,19 +187,13 @@ class TrendingOrchestrator:
         - "Song Title - Artist"
         - Use channel name as fallback
         """
-        # Remove common suffixes
-        title_clean = title.lower()
-        for suffix in ['(official video)', '(official music video)', '(lyric video)', 
-                       '(audio)', '[official video]', '(vevo)', '(official audio)']:
-            title_clean = title_clean.replace(suffix, '')
-        
-        title_clean = title_clean.strip()
+        # Remove common suffixes (case-insensitive, original casing is kept)
+        title_clean = _TITLE_SUFFIX_RE.sub('', title).strip()
         
-        # Try to split by dash
-        if ' - ' in title_clean:
-            parts = title_clean.split(' - ', 1)
-            # First part is usually the artist
-            return parts[0].strip().title()
+        # Try to split by dash (first part is usually the artist)
+        artist, separator, _ = title_clean.partition(' - ')
+        if separator:
+            return artist.strip().title()
         
         # Fallback to channel name
         return channel
@@ -180,31 +205,32 @@ class TrendingOrchestrator:
         """
         trending_songs = self.search_trending_songs()
         
-        new_songs_count = 0
+        # Check which songs are already in database (single query)
+        existing_ids = self.db.existing_youtube_ids(
+            [song['youtube_id'] for song in trending_songs]
+        )
         
+        new_songs = []
         for song in trending_songs:
-            youtube_id = song['youtube_id']
-            
-            # Check if already in database
-            if self.db.song_exists(youtube_id):
-                logger.debug(f"Song already in database: {song['title']}")
+            if song['youtube_id'] in existing_ids:
+                logger.debug("Song already in database: {}", song['title'])
                 continue
-            
-            # Add to database with pending status
-            try:
-                self.db.add_song(
-                    youtube_id=youtube_id,
-                    title=song['title'],
-                    url=song['url'],
-                    artist=song['artist']
-                )
-                logger.info(f"Added new trending song: {song['title']} - {song['artist']}")
-                new_songs_count += 1
-            
-            except Exception as e:
-                logger.error(f"Error adding song to database: {e}")
+            new_songs.append(song)
+        
+        # Add all new songs with pending status in one transaction
+        new_songs_count = 0
+        try:
+            new_songs_count = self.db.add_songs_bulk([
+                (song['youtube_id'], song['title'], song['artist'], song['url'])
+                for song in new_songs
+            ])
+            for song in new_songs:
+                logger.info("Added new trending song: {} - {}", song['title'], song['artist'])
+        
+        except Exception as e:
+            logger.error(f"Error adding songs to database: {e}")
         
-        logger.info(f"Added {new_songs_count} new trending songs to database")
+        logger.info("Added {} new trending songs to database", new_songs_count)
         return new_songs_count
     
     def get_pending_songs(self) -> List[Dict]:
@@ -4,22 +4,52 @@ Orchestrates: Download → Separation → Modification → Transcription → Vid
 """
 
 import os
-import subprocess
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from loguru import logger
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
 import yt_dlp
-import whisper
+import ctranslate2
+from faster_whisper import WhisperModel
 
 from database import Database, SongStatus
 from audio_modifier import AudioModifier
 from lyrics_generator import LyricsGenerator
 from video_generator import VideoGenerator
 from youtube_uploader import YouTubeUploader
-from utils import sanitize_filename, get_file_size_mb
+from utils import ensure_dir, sanitize_filename, get_file_size_mb
+
+
+@lru_cache(maxsize=None)
+def _get_whisper_model(name: str, device: str, compute_type: str, cpu_threads: int) -> WhisperModel:
+    """Load a Whisper model once per process; later processors reuse the instance"""
+    logger.info(f"Loading Whisper model: {name} ({device}, {compute_type}, {cpu_threads} threads)")
+    return WhisperModel(
+        name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads
+    )
 
 
 class KaraokeProcessor:
+    # Pretrained Demucs model (same default as the demucs CLI)
+    DEMUCS_MODEL = 'htdemucs'
+    
+    # Whisper works on 16 kHz mono audio
+    WHISPER_SAMPLE_RATE = 16000
+    
+    # Song columns pointing into the per-song scratch directory
+    SCRATCH_PATH_FIELDS = ('vocal_path', 'instrumental_path', 'modified_instrumental_path')
+    
     def __init__(self, config: Dict, db: Database):
         self.config = config
         self.db = db
@@ -31,13 +61,144 @@ class KaraokeProcessor:
         self.video_generator = VideoGenerator(config)
         self.youtube_uploader = YouTubeUploader(config)
         
-        # Load Whisper model
-        whisper_model = config['audio']['transcription']['model']
-        logger.info(f"Loading Whisper model: {whisper_model}")
-        self.whisper_model = whisper.load_model(whisper_model)
-        
-        # Spleeter settings
+        # Separation and transcription run on different frameworks (torch/TensorFlow
+        # and CTranslate2), so with "auto" each one checks for a GPU it can use
+        configured_device = config['audio'].get('device', 'auto')
         self.separation_model = config['audio']['separation']['model']
+        self.device = self._separation_device(configured_device)
+        self.whisper_device = configured_device
+        if self.whisper_device == 'auto':
+            self.whisper_device = 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+        
+        # Load Whisper model (CTranslate2 backend, int8 quantized by default)
+        transcription_config = config['audio']['transcription']
+        whisper_model = transcription_config['model']
+        compute_type = transcription_config.get('compute_type', 'auto')
+        if compute_type == 'auto':
+            compute_type = 'int8_float16' if self.whisper_device == 'cuda' else 'int8'
+        # Transcription runs alongside the background renders: share the cores with them
+        cpu_threads = max(1, (os.cpu_count() or 4) // (self.video_generator.workers + 1))
+        self.whisper_model = _get_whisper_model(whisper_model, self.whisper_device, compute_type, cpu_threads)
+        
+        # Load the separation model once; it is reused for every song
+        self.separator = self._load_separator()
+        
+        # Background work: next song's download and the instrumental modification
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='karaoke')
+        
+        # Renders (ffmpeg) and uploads of finished songs run alongside the next song
+        self.video_workers = self.video_generator.workers
+        self._render_executor = ThreadPoolExecutor(max_workers=self.video_workers, thread_name_prefix='render')
+        
+        # The uploader's HTTP connection (httplib2) isn't thread-safe: one upload at a time
+        self._upload_lock = threading.Lock()
+    
+    def process_batch(self, youtube_ids: List[str]) -> Iterator[Tuple[str, bool]]:
+        """
+        Process several songs with the models already loaded by this processor
+        
+        Args:
+            youtube_ids: YouTube video IDs, processed in order
+        
+        Yields:
+            (youtube_id, success) after each song, so the caller can stop early.
+            Failures before the render are reported at once, so results may
+            come out of order.
+        """
+        # The next song is downloaded in the background while the current one is
+        # processed, and finished songs are rendered while the next one is prepared
+        download = None
+        next_index = 0
+        renders = deque()
+        stop = threading.Event()
+        
+        try:
+            for i, youtube_id in enumerate(youtube_ids):
+                if download is None:
+                    download = self._executor.submit(self._prefetch_audio, youtube_id)
+                current, download = download, None
+                
+                next_index = i + 1
+                if next_index < len(youtube_ids):
+                    download = self._executor.submit(self._prefetch_audio, youtube_ids[next_index])
+                
+                prepared = self._prepare_song(youtube_id, current)
+                if not prepared:
+                    yield youtube_id, False
+                    continue
+                renders.append((youtube_id, self._render_executor.submit(self._finish_song, *prepared, stop)))
+                
+                # Report renders in order; only wait once every render worker is busy
+                while renders and (len(renders) > self.video_workers or renders[0][1].done()):
+                    done_id, render = renders.popleft()
+                    yield done_id, render.result()
+            
+            while renders:
+                done_id, render = renders.popleft()
+                yield done_id, render.result()
+        finally:
+            # Stopped early: songs not reported yet are not uploaded. Renders that
+            # haven't started go back to the queue; running ones are kept locally
+            stop.set()
+            for youtube_id, render in renders:
+                if render.cancel():
+                    self._discard_scratch(youtube_id)
+                    self.db.update_status(youtube_id, SongStatus.PENDING)
+                    logger.info(f"Batch stopped: {youtube_id} put back in the queue")
+                else:
+                    # Don't hold up the caller; report the song when its render ends
+                    logger.info(f"Batch stopped: {youtube_id} is still rendering in the background")
+                    render.add_done_callback(
+                        lambda render, youtube_id=youtube_id: self._log_background_render(youtube_id, render)
+                    )
+            if download is not None and not download.cancel():
+                try:
+                    download.result()
+                except Exception as e:
+                    logger.error(f"Error prefetching {youtube_ids[next_index]}: {e}")
+                self.db.update_status(youtube_ids[next_index], SongStatus.PENDING)
+    
+    def _log_background_render(self, youtube_id: str, render: Future):
+        """Report a song whose render was still running when its batch stopped"""
+        if not render.result():
+            logger.info(f"Batch stopped: {youtube_id} failed in the background")
+            return
+        
+        # Its upload may already have been under way when the batch stopped
+        upload_id = self.db.get_song_by_youtube_id(youtube_id)['youtube_upload_id']
+        result = f"uploaded as {upload_id}" if upload_id else "video kept locally"
+        logger.info(f"Batch stopped: {youtube_id} finished in the background ({result})")
+    
+    def close(self):
+        """Shut down the worker threads, letting renders already running finish"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._render_executor.shutdown(wait=True, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _prefetch_audio(self, youtube_id: str) -> Optional[str]:
+        """Download a song's audio ahead of processing it"""
+        song = self.db.get_song_by_youtube_id(youtube_id)
+        return self._download_audio(song, self._song_paths(song)) if song else None
+    
+    def _song_paths(self, song: Dict) -> Dict[str, Path]:
+        """Compute every per-song output location once"""
+        youtube_id = song['youtube_id']
+        safe_title = sanitize_filename(f"{song['artist']} - {song['title']}")
+        scratch_dir = Path(self.paths['scratch']) / youtube_id
+        
+        return {
+            'download': Path(self.paths['downloads']) / f"{safe_title}_{youtube_id}.wav",
+            'scratch_dir': scratch_dir,
+            'vocals': scratch_dir / 'vocals.wav',
+            'instrumental': scratch_dir / 'instrumental.wav',
+            'song_dir': Path(self.paths['processed']) / youtube_id,
+            'video': Path(self.paths['videos']) / f"{safe_title}_{youtube_id}.mp4",
+        }
     
     def process_song(self, youtube_id: str) -> bool:
         """
@@ -49,50 +210,106 @@ class KaraokeProcessor:
         Returns:
             True if successful, False otherwise
         """
+        prepared = self._prepare_song(youtube_id)
+        return self._finish_song(*prepared) if prepared else False
+    
+    def _prepare_song(self, youtube_id: str, download: Optional[Future] = None) -> Optional[Tuple]:
+        """
+        Steps 1-5: everything up to the lyrics, using the loaded models
+        
+        Returns:
+            (song, ctx, modified instrumental path, lyrics path) for _finish_song,
+            or None if a step failed
+        """
+        prepared = None
+        
         try:
             # Get song info from database
             song = self.db.get_song_by_youtube_id(youtube_id)
             if not song:
                 logger.error(f"Song not found in database: {youtube_id}")
-                return False
+                return None
             
             logger.info(f"Processing song: {song['title']} - {song['artist']}")
             
-            # Step 1: Download audio
-            audio_path = self._download_audio(song)
+            # Output locations for every step, with their directories created up front
+            ctx = self._song_paths(song)
+            ensure_dir(ctx['song_dir'])
+            ctx['scratch_dir'].mkdir(parents=True, exist_ok=True)
+            
+            # Step 1: Download audio (unless it was prefetched)
+            audio_path = download.result() if download else self._download_audio(song, ctx)
             if not audio_path:
-                return False
+                return None
             
             # Step 2: Separate vocals and instrumental
-            vocal_path, instrumental_path = self._separate_audio(song, audio_path)
+            vocal_path, instrumental_path = self._separate_audio(song, audio_path, ctx)
             if not vocal_path or not instrumental_path:
-                return False
+                return None
             
-            # Step 3: Modify instrumental (subtle changes)
-            modified_instrumental = self._modify_instrumental(song, instrumental_path)
-            if not modified_instrumental:
-                return False
+            # Steps 3 and 4 touch different files, so the instrumental is
+            # modified in the background while Whisper transcribes
+            modification = self._executor.submit(self._modify_instrumental, song, instrumental_path, ctx)
             
-            # Step 4: Transcribe vocals to get lyrics
-            lyrics_srt_path = self._transcribe_vocals(song, vocal_path)
-            if not lyrics_srt_path:
-                return False
+            # Step 4: Transcribe vocals to get lyrics (with word timings)
+            segments = self._transcribe_vocals(song, vocal_path, ctx)
             
-            # Step 5: Convert SRT to ASS karaoke format
-            lyrics_ass_path = self._generate_ass_lyrics(song, lyrics_srt_path)
+            # Step 3: Modify instrumental (subtle changes)
+            modified_instrumental = modification.result()
+            if not modified_instrumental or segments is None:
+                return None
+            
+            # Step 5: Write the segments as ASS karaoke
+            lyrics_ass_path = self._generate_ass_lyrics(song, segments, ctx)
             if not lyrics_ass_path:
-                return False
+                return None
             
+            prepared = (song, ctx, modified_instrumental, lyrics_ass_path)
+            return prepared
+        
+        except Exception as e:
+            logger.error(f"Error processing song {youtube_id}: {e}")
+            self.db.update_status(youtube_id, SongStatus.FAILED, str(e))
+            return None
+        
+        finally:
+            # The render step still needs the stems; otherwise free the scratch space now
+            if prepared is None:
+                self._discard_scratch(youtube_id)
+    
+    def _finish_song(
+        self,
+        song,
+        ctx: Dict[str, Path],
+        modified_instrumental: str,
+        lyrics_ass_path: str,
+        stop: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Steps 6-7: render the video and upload it (no models needed, safe to run in the background)
+        
+        Once stop is set (the batch was abandoned) the video is only kept locally.
+        """
+        youtube_id = song['youtube_id']
+        
+        try:
             # Step 6: Generate karaoke video
-            video_path = self._generate_video(song, modified_instrumental, lyrics_ass_path)
+            video_path = self._generate_video(song, modified_instrumental, lyrics_ass_path, ctx)
             if not video_path:
                 return False
             
-            # Step 7: Upload to YouTube (if enabled)
-            youtube_video_id = self._upload_to_youtube(song, video_path)
+            # Step 7: Upload to YouTube (if enabled and the batch is still running)
+            if stop is not None and stop.is_set():
+                logger.warning(f"Batch stopped, not uploading: {song['title']}")
+                youtube_video_id = None
+            else:
+                youtube_video_id = self._upload_to_youtube(song, video_path)
             
-            # Mark as completed
-            self.db.update_status(youtube_id, SongStatus.COMPLETED)
+            # Mark as completed, recording the final outputs in the same write
+            outputs = {'video_path': video_path}
+            if youtube_video_id:
+                outputs['youtube_upload_id'] = youtube_video_id
+            self.db.update_status(youtube_id, SongStatus.COMPLETED, **outputs)
             
             logger.info("="*60)
             logger.info(f"✅ Successfully processed: {song['title']}")
@@ -101,7 +318,7 @@ class KaraokeProcessor:
             if youtube_video_id:
                 logger.info(f"🔗 YouTube: https://www.youtube.com/watch?v={youtube_video_id}")
             else:
-                logger.info("⏭️  Not uploaded to YouTube (upload disabled)")
+                logger.info("⏭️  Not uploaded to YouTube")
             logger.info("="*60)
             
             return True
@@ -110,16 +327,23 @@ class KaraokeProcessor:
             logger.error(f"Error processing song {youtube_id}: {e}")
             self.db.update_status(youtube_id, SongStatus.FAILED, str(e))
             return False
+        
+        finally:
+            # Stems only feed the next step; free the scratch space once the song is done
+            self._discard_scratch(youtube_id)
     
-    def _download_audio(self, song: Dict) -> Optional[str]:
+    def _discard_scratch(self, youtube_id: str):
+        """Delete a song's scratch directory and forget the paths that pointed into it"""
+        shutil.rmtree(Path(self.paths['scratch']) / youtube_id, ignore_errors=True)
+        self.db.update_paths(youtube_id, **dict.fromkeys(self.SCRATCH_PATH_FIELDS))
+    
+    def _download_audio(self, song: Dict, ctx: Dict[str, Path]) -> Optional[str]:
         """Download audio from YouTube"""
         try:
             self.db.update_status(song['youtube_id'], SongStatus.DOWNLOADING)
             logger.info(f"Downloading audio: {song['url']}")
             
-            # Create safe filename
-            safe_title = sanitize_filename(f"{song['artist']} - {song['title']}")
-            output_path = Path(self.paths['downloads']) / f"{safe_title}_{song['youtube_id']}.wav"
+            output_path = ctx['download']
             
             # yt-dlp options
             ydl_opts = {
@@ -129,6 +353,11 @@ class KaraokeProcessor:
                     'key': 'FFmpegExtractAudio',
                     'preferredcodec': 'wav',
                 }],
+                # Decode straight to the 44.1 kHz stereo 16-bit PCM the rest of the
+                # pipeline works in, so separation does not have to resample
+                'postprocessor_args': {
+                    'extractaudio': ['-ar', '44100', '-ac', '2', '-sample_fmt', 's16'],
+                },
                 'quiet': True,
                 'no_warnings': True,
             }
@@ -141,132 +370,124 @@ class KaraokeProcessor:
             
             logger.info(f"Audio downloaded: {output_path.name} ({get_file_size_mb(output_path):.1f} MB)")
             
-            # Update database
-            self.db.update_paths(song['youtube_id'], download_path=str(output_path))
-            
+            # The download path is recorded with the next status change
             return str(output_path)
         
         except Exception as e:
             logger.error(f"Error downloading audio: {e}")
             return None
     
-    def _separate_audio(self, song: Dict, audio_path: str) -> tuple[Optional[str], Optional[str]]:
+    def _separate_audio(self, song: Dict, audio_path: str, ctx: Dict[str, Path]) -> tuple[Optional[str], Optional[str]]:
         """Separate vocals and instrumental using Demucs or Spleeter"""
         try:
-            self.db.update_status(song['youtube_id'], SongStatus.SEPARATING)
+            self.db.update_status(song['youtube_id'], SongStatus.SEPARATING, download_path=audio_path)
             logger.info("Separating vocals and instrumental")
             
-            output_dir = Path(self.paths['processed']) / song['youtube_id']
-            output_dir.mkdir(parents=True, exist_ok=True)
+            # Intermediate stems go to scratch space, not persistent storage
+            output_dir = ctx['scratch_dir']
+            vocal_path = ctx['vocals']
+            instrumental_path = ctx['instrumental']
             
             if self.separation_model == 'demucs':
-                # Use Demucs command line
-                cmd = [
-                    'demucs',
-                    '--two-stems=vocals',  # Only vocals and accompaniment
-                    '-o', str(output_dir.parent),
-                    '--name', song['youtube_id'],
-                    audio_path
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    logger.error(f"Demucs error: {result.stderr}")
-                    raise RuntimeError("Demucs separation failed")
-                
-                # Demucs outputs to: output_dir/htdemucs/<youtube_id>/vocals.wav and no_vocals.wav
-                demucs_output_dir = output_dir.parent / 'htdemucs' / song['youtube_id']
-                
-                vocal_path = demucs_output_dir / 'vocals.wav'
-                instrumental_path = demucs_output_dir / 'no_vocals.wav'
-                
-                if not vocal_path.exists() or not instrumental_path.exists():
-                    raise FileNotFoundError("Demucs output files not found")
-                
-                # Move to our organized directory
-                final_vocal_path = output_dir / 'vocals.wav'
-                final_instrumental_path = output_dir / 'instrumental.wav'
-                
-                import shutil
-                shutil.copy2(vocal_path, final_vocal_path)
-                shutil.copy2(instrumental_path, final_instrumental_path)
-                
-                # Clean up demucs directory
-                if demucs_output_dir.parent.exists():
-                    shutil.rmtree(demucs_output_dir.parent)
-                
-                vocal_path = final_vocal_path
-                instrumental_path = final_instrumental_path
-            
-            elif self.separation_model == 'spleeter':
-                # Use Spleeter command line
-                cmd = [
-                    'spleeter',
-                    'separate',
-                    '-p', 'spleeter:2stems',  # 2 stems: vocals + accompaniment
-                    '-o', str(output_dir.parent),
-                    audio_path
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    logger.error(f"Spleeter error: {result.stderr}")
-                    raise RuntimeError("Spleeter separation failed")
-                
-                # Spleeter outputs to: output_dir/<filename>/vocals.wav and accompaniment.wav
-                audio_name = Path(audio_path).stem
-                spleeter_output_dir = output_dir.parent / audio_name
-                
-                vocal_path = spleeter_output_dir / 'vocals.wav'
-                instrumental_path = spleeter_output_dir / 'accompaniment.wav'
-                
-                if not vocal_path.exists() or not instrumental_path.exists():
-                    raise FileNotFoundError("Spleeter output files not found")
-                
-                # Move to our organized directory
-                final_vocal_path = output_dir / 'vocals.wav'
-                final_instrumental_path = output_dir / 'instrumental.wav'
-                
-                vocal_path.rename(final_vocal_path)
-                instrumental_path.rename(final_instrumental_path)
-                
-                # Clean up spleeter directory
-                if spleeter_output_dir.exists():
-                    import shutil
-                    shutil.rmtree(spleeter_output_dir)
-                
-                vocal_path = final_vocal_path
-                instrumental_path = final_instrumental_path
-            
+                self._separate_with_demucs(audio_path, vocal_path, instrumental_path)
             else:
-                raise NotImplementedError(f"Separation model not implemented: {self.separation_model}")
+                self._separate_with_spleeter(audio_path, output_dir, instrumental_path)
+            
+            if not vocal_path.exists() or not instrumental_path.exists():
+                raise FileNotFoundError("Separation output files not found")
             
             logger.info(f"Audio separated successfully")
             logger.info(f"  Vocals: {get_file_size_mb(vocal_path):.1f} MB")
             logger.info(f"  Instrumental: {get_file_size_mb(instrumental_path):.1f} MB")
             
-            # Update database
-            self.db.update_paths(
-                song['youtube_id'],
-                vocal_path=str(vocal_path),
-                instrumental_path=str(instrumental_path)
-            )
-            
+            # The stem paths are recorded together with the next status
             return str(vocal_path), str(instrumental_path)
         
         except Exception as e:
             logger.error(f"Error separating audio: {e}")
             return None, None
     
-    def _modify_instrumental(self, song: Dict, instrumental_path: str) -> Optional[str]:
+    def _separation_device(self, configured_device: str) -> str:
+        """Device for the separation model ("auto" picks CUDA when its framework can use it)"""
+        if configured_device != 'auto':
+            return configured_device
+        
+        if self.separation_model == 'demucs':
+            import torch
+            return 'cuda' if torch.cuda.is_available() else 'cpu'
+        
+        # TensorFlow (Spleeter) uses a GPU by itself when it has one
+        return 'cuda'
+    
+    def _load_separator(self):
+        """Load the Demucs model or Spleeter separator selected in config"""
+        logger.info(f"Loading separation model: {self.separation_model}")
+        
+        if self.separation_model == 'demucs':
+            from demucs.pretrained import get_model
+            
+            model = get_model(self.DEMUCS_MODEL)
+            model.to(self.device)
+            model.eval()
+            return model
+        
+        if self.separation_model == 'spleeter':
+            # TensorFlow grabs any visible GPU, so hide them when running on CPU
+            if self.device == 'cpu':
+                os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+            
+            from spleeter.separator import Separator
+            
+            # 2 stems: vocals + accompaniment
+            return Separator('spleeter:2stems', multiprocess=False)
+        
+        raise NotImplementedError(f"Separation model not implemented: {self.separation_model}")
+    
+    def _separate_with_demucs(self, audio_path: str, vocal_path: Path, instrumental_path: Path):
+        """Run Demucs in-process and write vocals and the summed accompaniment"""
+        import torch
+        from demucs.apply import apply_model
+        from demucs.audio import convert_audio, save_audio
+        
+        model = self.separator
+        audio, sample_rate = sf.read(audio_path, dtype='float32', always_2d=True)
+        wav = convert_audio(torch.from_numpy(audio.T), sample_rate, model.samplerate, model.audio_channels)
+        
+        # Normalize like the demucs CLI does, then undo it on the sources
+        ref = wav.mean(0)
+        mean, std = ref.mean(), ref.std()
+        with torch.no_grad():
+            sources = apply_model(model, ((wav - mean) / std)[None], device=self.device,
+                                  split=True, overlap=0.25, progress=False)[0]
+        sources = sources * std + mean
+        
+        # Two stems: vocals and everything else
+        vocals = sources[model.sources.index('vocals')]
+        save_audio(vocals, str(vocal_path), samplerate=model.samplerate)
+        save_audio(sources.sum(0) - vocals, str(instrumental_path), samplerate=model.samplerate)
+        
+        # Hand the separation peak memory back before Whisper runs
+        if self.device == 'cuda':
+            del sources, vocals
+            torch.cuda.empty_cache()
+    
+    def _separate_with_spleeter(self, audio_path: str, output_dir: Path, instrumental_path: Path):
+        """Run Spleeter in-process, writing its stems straight into output_dir"""
+        self.separator.separate_to_file(
+            audio_path,
+            str(output_dir),
+            filename_format='{instrument}.{codec}',
+            synchronous=True
+        )
+        # Same directory, so this is an atomic rename that also overwrites a previous run
+        os.replace(output_dir / 'accompaniment.wav', instrumental_path)
+    
+    def _modify_instrumental(self, song: Dict, instrumental_path: str, ctx: Dict[str, Path]) -> Optional[str]:
         """Apply subtle modifications to instrumental"""
         try:
             logger.info("Modifying instrumental")
             
-            output_dir = Path(self.paths['processed']) / song['youtube_id']
-            modified_path = output_dir / 'instrumental_modified.wav'
+            modified_path = ctx['scratch_dir'] / 'instrumental_modified.wav'
             
             result_path = self.audio_modifier.modify_instrumental(
                 instrumental_path,
@@ -275,79 +496,100 @@ class KaraokeProcessor:
             
             logger.info(f"Instrumental modified: {get_file_size_mb(result_path):.1f} MB")
             
-            # Update database
-            self.db.update_paths(
-                song['youtube_id'],
-                modified_instrumental_path=result_path
-            )
-            
+            # The path is recorded when video generation starts
             return result_path
         
         except Exception as e:
             logger.error(f"Error modifying instrumental: {e}")
             return None
     
-    def _transcribe_vocals(self, song: Dict, vocal_path: str) -> Optional[str]:
-        """Transcribe vocals using Whisper"""
+    def _transcribe_vocals(self, song: Dict, vocal_path: str, ctx: Dict[str, Path]) -> Optional[List]:
+        """Transcribe vocals using Whisper, returning segments with word timestamps"""
         try:
-            self.db.update_status(song['youtube_id'], SongStatus.TRANSCRIBING)
+            self.db.update_status(
+                song['youtube_id'],
+                SongStatus.TRANSCRIBING,
+                vocal_path=str(ctx['vocals']),
+                instrumental_path=str(ctx['instrumental'])
+            )
             logger.info("Transcribing vocals with Whisper")
             
-            language = self.config['audio']['transcription']['language']
-            
-            # Transcribe with Whisper
-            result = self.whisper_model.transcribe(
-                vocal_path,
+            transcription_config = self.config['audio']['transcription']
+            # A fixed language skips Whisper's detection pass; "auto" detects it per song
+            language = transcription_config['language']
+            if language == 'auto':
+                language = None
+            
+            # Transcribe with Whisper (segments are yielded lazily, so consume them here).
+            # Greedy decoding without the previous text as prompt keeps the decoder
+            # cheap and stops repeated lines in choruses from feeding on each other.
+            segments, _ = self.whisper_model.transcribe(
+                self._load_vocals_for_whisper(vocal_path),
                 language=language,
                 task='transcribe',
-                verbose=False
+                beam_size=1,
+                best_of=1,
+                condition_on_previous_text=False,
+                vad_filter=True,
+                word_timestamps=True
             )
+            segments = list(segments)
             
-            # Save as SRT
-            output_dir = Path(self.paths['processed']) / song['youtube_id']
-            srt_path = output_dir / 'lyrics.srt'
+            # SRT is only kept as a debugging aid; the ASS is built from the segments
+            if transcription_config.get('save_srt', False):
+                self._save_whisper_as_srt(segments, str(ctx['song_dir'] / 'lyrics.srt'))
             
-            # Convert Whisper output to SRT format
-            self._save_whisper_as_srt(result, str(srt_path))
+            logger.info(f"Lyrics transcribed: {len(segments)} segments")
             
-            logger.info(f"Lyrics transcribed: {len(result['segments'])} segments")
-            
-            return str(srt_path)
+            return segments
         
         except Exception as e:
             logger.error(f"Error transcribing vocals: {e}")
             return None
     
-    def _save_whisper_as_srt(self, whisper_result: Dict, output_path: str):
-        """Convert Whisper result to SRT format"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(whisper_result['segments'], start=1):
-                start_time = self._seconds_to_srt_time(segment['start'])
-                end_time = self._seconds_to_srt_time(segment['end'])
-                text = segment['text'].strip()
-                
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
+    def _load_vocals_for_whisper(self, vocal_path: str) -> np.ndarray:
+        """Read the vocals stem as 16 kHz mono float32, ready to hand to Whisper"""
+        audio, sample_rate = sf.read(vocal_path, dtype='float32', always_2d=True)
+        
+        # Downmix first so only one channel has to be resampled
+        audio = audio.mean(axis=1)
+        if sample_rate != self.WHISPER_SAMPLE_RATE:
+            ratio = Fraction(self.WHISPER_SAMPLE_RATE, sample_rate)
+            audio = resample_poly(audio, ratio.numerator, ratio.denominator)
+        
+        return audio.astype(np.float32, copy=False)
+    
+    def _save_whisper_as_srt(self, segments: List, output_path: str):
+        """Convert Whisper segments to SRT format"""
+        # Build the whole file in memory, encode it once and write the bytes
+        blocks = [
+            f"{i}\n"
+            f"{self._seconds_to_srt_time(segment.start)} --> {self._seconds_to_srt_time(segment.end)}\n"
+            f"{segment.text.strip()}\n\n"
+            for i, segment in enumerate(segments, start=1)
+        ]
+        
+        with open(output_path, 'wb') as f:
+            f.write(''.join(blocks).encode('utf-8'))
     
     def _seconds_to_srt_time(self, seconds: float) -> str:
         """Convert seconds to SRT time format (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
+        # Split whole milliseconds with integer divmod (no float modulo artifacts)
+        millis = int(seconds * 1000 + 0.5)
+        secs, millis = divmod(millis, 1000)
+        minutes, secs = divmod(secs, 60)
+        hours, minutes = divmod(minutes, 60)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
     
-    def _generate_ass_lyrics(self, song: Dict, srt_path: str) -> Optional[str]:
-        """Generate ASS karaoke file from SRT"""
+    def _generate_ass_lyrics(self, song: Dict, segments: List, ctx: Dict[str, Path]) -> Optional[str]:
+        """Generate ASS karaoke file from Whisper segments"""
         try:
             logger.info("Generating ASS karaoke lyrics")
             
-            output_dir = Path(self.paths['processed']) / song['youtube_id']
-            ass_path = output_dir / 'lyrics.ass'
+            ass_path = ctx['song_dir'] / 'lyrics.ass'
             
-            result_path = self.lyrics_generator.srt_to_ass_karaoke(
-                str(srt_path),
+            result_path = self.lyrics_generator.segments_to_ass_karaoke(
+                segments,
                 str(ass_path)
             )
             
@@ -355,26 +597,25 @@ class KaraokeProcessor:
             if not self.lyrics_generator.validate_ass_file(result_path):
                 raise ValueError("Invalid ASS file generated")
             
-            # Update database
-            self.db.update_paths(
-                song['youtube_id'],
-                lyrics_path=result_path
-            )
-            
+            # The path is recorded when video generation starts
             return result_path
         
         except Exception as e:
             logger.error(f"Error generating ASS lyrics: {e}")
             return None
     
-    def _generate_video(self, song: Dict, audio_path: str, lyrics_path: str) -> Optional[str]:
+    def _generate_video(self, song: Dict, audio_path: str, lyrics_path: str, ctx: Dict[str, Path]) -> Optional[str]:
         """Generate karaoke video"""
         try:
-            self.db.update_status(song['youtube_id'], SongStatus.GENERATING_VIDEO)
+            self.db.update_status(
+                song['youtube_id'],
+                SongStatus.GENERATING_VIDEO,
+                modified_instrumental_path=audio_path,
+                lyrics_path=lyrics_path
+            )
             logger.info("Generating karaoke video")
             
-            safe_title = sanitize_filename(f"{song['artist']} - {song['title']}")
-            output_path = Path(self.paths['videos']) / f"{safe_title}_{song['youtube_id']}.mp4"
+            output_path = ctx['video']
             
             result_path = self.video_generator.create_karaoke_video(
                 audio_path=audio_path,
@@ -390,12 +631,6 @@ class KaraokeProcessor:
             logger.info(f"Video generated: {get_file_size_mb(result_path):.1f} MB, "
                        f"{verification.get('duration', 0):.1f}s")
             
-            # Update database
-            self.db.update_paths(
-                song['youtube_id'],
-                video_path=result_path
-            )
-            
             return result_path
         
         except Exception as e:
@@ -410,23 +645,17 @@ class KaraokeProcessor:
                 logger.info(f"📹 Video saved locally at: {video_path}")
                 return None
             
-            self.db.update_status(song['youtube_id'], SongStatus.UPLOADING)
+            self.db.update_status(song['youtube_id'], SongStatus.UPLOADING, video_path=video_path)
             logger.info("Uploading to YouTube")
             
-            youtube_video_id = self.youtube_uploader.upload_karaoke_video(
-                video_path=video_path,
-                song_info=song
-            )
-            
-            if youtube_video_id:
-                # Update database
-                self.db.update_paths(
-                    song['youtube_id'],
-                    youtube_upload_id=youtube_video_id
+            with self._upload_lock:
+                youtube_video_id = self.youtube_uploader.upload_karaoke_video(
+                    video_path=video_path,
+                    song_info=dict(song)
                 )
-                return youtube_video_id
             
-            return None
+            # The upload ID is recorded together with the completed status
+            return youtube_video_id or None
         
         except Exception as e:
             logger.error(f"Error uploading to YouTube: {e}")
@@ -2,13 +2,53 @@
 Utility functions for the karaoke automation system
 """
 
+import copy
+import json
+import os
 import re
+import shutil
+import tempfile
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
+from googleapiclient.discovery_cache import get_static_doc
 from loguru import logger
 import sys
 
+# Directories already created by ensure_dir in this process
+_DIRS_READY = set()
+
+# Free space /dev/shm needs before it is used as scratch (stems are ~40 MB each)
+SCRATCH_MIN_FREE_BYTES = 1 << 30
+
+try:
+    # libyaml-backed loader, much faster than the pure-Python one
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+# Characters not allowed in Windows/Unix filenames, removed in one translate pass
+_INVALID_FILENAME_CHARS = str.maketrans('', '', '<>:"/\\|?*')
+
+# Patterns used on every song, compiled once
+_WHITESPACE_RE = re.compile(r'\s+')
+_YOUTUBE_ID_URL_RES = (
+    re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([a-zA-Z0-9_-]{11})'),
+    re.compile(r'youtube\.com\/watch\?.*v=([a-zA-Z0-9_-]{11})'),
+)
+_YOUTUBE_ID_RE = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+_ARTIST_EXTRAS_RES = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'\s*[\(\[].*?feat\..*?[\)\]]',  # (feat. Artist)
+        r'\s*[\(\[].*?ft\..*?[\)\]]',    # (ft. Artist)
+        r'\s*[\(\[].*?vs\..*?[\)\]]',    # (vs. Artist)
+        r'\s*[\(\[].*?x.*?[\)\]]',       # (x Artist)
+    )
+)
+
 
 def setup_logging(config: Dict[str, Any]):
     """Configure logging with loguru"""
@@ -44,40 +84,58 @@ def setup_logging(config: Dict[str, Any]):
 
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     """Load configuration from YAML file"""
-    config_file = Path(config_path)
-    
-    if not config_file.exists():
+    # Callers are free to modify their copy without affecting the cached parse
+    return copy.deepcopy(_parse_config(config_path))
+
+
+@lru_cache(maxsize=4)
+def _parse_config(config_path: str) -> Dict[str, Any]:
+    """Parse the YAML file once per process"""
+    if not os.path.exists(config_path):
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     
-    with open(config_file, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=_YamlLoader)
     
     # Expand paths to absolute
     if 'paths' in config:
         for key, path in config['paths'].items():
-            config['paths'][key] = str(Path(path).resolve())
+            config['paths'][key] = os.path.abspath(path)
+        
+        config['paths'].setdefault('scratch', default_scratch_dir())
     
     return config
 
 
+def default_scratch_dir() -> str:
+    """
+    Directory for per-song intermediate files
+    
+    Uses RAM-backed /dev/shm when it exists and has room for a few songs'
+    WAV stems, otherwise the system temp directory.
+    """
+    shm = '/dev/shm'
+    if os.path.isdir(shm) and shutil.disk_usage(shm).free >= SCRATCH_MIN_FREE_BYTES:
+        return os.path.join(shm, 'ytb-automate')
+    
+    return os.path.join(tempfile.gettempdir(), 'ytb-automate')
+
+
+@lru_cache(maxsize=None)
+def get_discovery_doc(service: str, version: str) -> Dict[str, Any]:
+    """Load and parse a bundled Google API discovery document once per process"""
+    return json.loads(get_static_doc(service, version))
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename by removing invalid characters
     """
-    # Remove invalid characters for Windows/Unix filesystems
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    
-    # Replace multiple spaces with single space
-    filename = re.sub(r'\s+', ' ', filename)
-    
-    # Remove leading/trailing spaces and dots
-    filename = filename.strip('. ')
+    # Remove invalid characters and collapse whitespace runs to a single space
+    filename = ' '.join(filename.translate(_INVALID_FILENAME_CHARS).split())
     
-    # Limit length
-    if len(filename) > 200:
-        filename = filename[:200]
-    
-    return filename
+    # Remove leading/trailing spaces and dots, then limit length
+    return filename.strip('. ')[:200]
 
 
 def extract_youtube_id(url: str) -> str:
@@ -89,18 +147,13 @@ def extract_youtube_id(url: str) -> str:
     - https://youtu.be/VIDEO_ID
     - https://www.youtube.com/embed/VIDEO_ID
     """
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([a-zA-Z0-9_-]{11})',
-        r'youtube\.com\/watch\?.*v=([a-zA-Z0-9_-]{11})'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _YOUTUBE_ID_URL_RES:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
     # If no pattern matches, assume it's already an ID
-    if re.match(r'^[a-zA-Z0-9_-]{11}$', url):
+    if _YOUTUBE_ID_RE.match(url):
         return url
     
     raise ValueError(f"Could not extract YouTube ID from: {url}")
@@ -108,9 +161,8 @@ def extract_youtube_id(url: str) -> str:
 
 def format_duration(seconds: float) -> str:
     """Format duration in seconds to HH:MM:SS"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     
     if hours > 0:
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
@@ -127,36 +179,18 @@ def clean_artist_name(artist: str) -> str:
         return ""
     
     # Remove common patterns
-    patterns = [
-        r'\s*[\(\[].*?feat\..*?[\)\]]',  # (feat. Artist)
-        r'\s*[\(\[].*?ft\..*?[\)\]]',    # (ft. Artist)
-        r'\s*[\(\[].*?vs\..*?[\)\]]',    # (vs. Artist)
-        r'\s*[\(\[].*?x.*?[\)\]]',       # (x Artist)
-    ]
-    
     cleaned = artist
-    for pattern in patterns:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    for pattern in _ARTIST_EXTRAS_RES:
+        cleaned = pattern.sub('', cleaned)
     
     # Remove extra whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
     
     return cleaned
 
 
-def generate_video_metadata(song_info: Dict[str, Any]) -> Dict[str, str]:
-    """
-    Generate optimized title, description, and tags for YouTube upload
-    """
-    title = song_info.get('title', 'Unknown')
-    artist = song_info.get('artist', 'Unknown Artist')
-    
-    # Clean artist name for tags
-    artist_tag = clean_artist_name(artist).replace(' ', '').lower()
-    
-    metadata = {
-        'title': f"{title} - Karaoke (Con Letra)",
-        'description': f"""🎤 Karaoke de {title} - {artist}
+# Static body of the upload description; only title, artist and tag vary per song
+_DESCRIPTION_TEMPLATE = """🎤 Karaoke de {title} - {artist}
 
 ¡Canta junto a esta versión de karaoke con letras sincronizadas palabra por palabra!
 
@@ -170,7 +204,22 @@ def generate_video_metadata(song_info: Dict[str, Any]) -> Dict[str, str]:
 
 ---
 Video generado automáticamente para uso educativo y de entretenimiento.
-""",
+"""
+
+
+def generate_video_metadata(song_info: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Generate optimized title, description, and tags for YouTube upload
+    """
+    title = song_info.get('title', 'Unknown')
+    artist = song_info.get('artist', 'Unknown Artist')
+    
+    # Clean artist name for tags
+    artist_tag = clean_artist_name(artist).replace(' ', '').lower()
+    
+    metadata = {
+        'title': f"{title} - Karaoke (Con Letra)",
+        'description': _DESCRIPTION_TEMPLATE.format(title=title, artist=artist, artist_tag=artist_tag),
         'tags': [
             'karaoke',
             'letra',
@@ -192,13 +241,25 @@ def ensure_directories(config: Dict[str, Any]):
     
     for key, path in paths.items():
         if key != 'database':  # Skip database file
-            Path(path).mkdir(parents=True, exist_ok=True)
+            ensure_dir(path)
     
     # Ensure database directory exists
-    db_path = Path(paths.get('database', './db/karaoke.db'))
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+    ensure_dir(os.path.dirname(os.path.abspath(paths.get('database', './db/karaoke.db'))))
+
+
+def ensure_dir(path):
+    """
+    Create a directory (and parents) unless this process already did
+    
+    Only for directories that are never removed while running; per-song
+    scratch directories are deleted after each song and must use mkdir.
+    """
+    path = os.fspath(path)
+    if path not in _DIRS_READY:
+        os.makedirs(path, exist_ok=True)
+        _DIRS_READY.add(path)
 
 
 def get_file_size_mb(file_path: str) -> float:
     """Get file size in MB"""
-    return Path(file_path).stat().st_size / (1024 * 1024)
+    return os.path.getsize(file_path) / (1024 * 1024)
@@ -3,14 +3,95 @@ Video Generator - Create karaoke videos using FFmpeg
 Combines audio, lyrics (ASS), background, and audio visualizer
 """
 
+import hashlib
+import os
 import subprocess
+import tempfile
+from fractions import Fraction
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from loguru import logger
 import random
+import threading
+import soundfile as sf
+
+
+@lru_cache(maxsize=256)
+def _probe_audio(audio_path: str, mtime_ns: int) -> Tuple[float, Optional[int]]:
+    """
+    Get audio duration in seconds and sample rate (None if unknown)
+    
+    WAV headers are read in-process; ffprobe is only spawned for formats
+    libsndfile can't open. The modification time is part of the cache key
+    so a rewritten file is probed again.
+    """
+    try:
+        info = sf.info(audio_path)
+        return info.duration, info.samplerate
+    except Exception:
+        pass
+    
+    probe_cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'a:0',
+        '-show_entries', 'format=duration:stream=sample_rate',
+        '-of', 'default=noprint_wrappers=1',
+        audio_path
+    ]
+    
+    try:
+        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
+        fields = dict(line.split('=', 1) for line in probe_result.stdout.splitlines() if '=' in line)
+        sample_rate = fields.get('sample_rate', 'N/A')
+        return float(fields['duration']), int(sample_rate) if sample_rate.isdigit() else None
+    except:
+        return 180, None  # Fallback to 3 minutes
+
+
+@lru_cache(maxsize=64)
+def _probe_video_stream(video_path: str) -> Optional[Tuple[int, int, Fraction]]:
+    """Get (width, height, frame rate) of a video or image's first stream, or None if unknown"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height,r_frame_rate',
+        '-of', 'csv=p=0',
+        video_path
+    ]
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        width, height, rate = result.stdout.strip().split(',')[:3]
+        return int(width), int(height), Fraction(rate)
+    except Exception:
+        return None
 
 
 class VideoGenerator:
+    # Video codec arguments per supported encoder (CRF/CQ 23 keeps quality comparable;
+    # libx264 preset/CRF/tune come from config, see _video_codec_args)
+    ENCODER_ARGS = {
+        'libx264': ['-c:v', 'libx264'],
+        'h264_nvenc': ['-c:v', 'h264_nvenc', '-preset', 'p5', '-tune', 'hq',
+                       '-rc', 'vbr', '-cq', '23', '-b:v', '0'],
+        'h264_qsv': ['-c:v', 'h264_qsv', '-preset', 'medium', '-global_quality', '23'],
+        'h264_vaapi': ['-c:v', 'h264_vaapi', '-qp', '23'],
+    }
+    
+    # Sample rates AAC output keeps as they are; anything else is resampled to 48 kHz
+    NATIVE_SAMPLE_RATES = (44100, 48000)
+    OUTPUT_SAMPLE_RATE = 48000
+    
+    # Extended attribute on a finished video holding the hash of what it was made from
+    INPUTS_HASH_XATTR = 'user.karaoke.hash'
+    
+    # Order in which encoder "auto" tries the hardware encoders
+    HW_ENCODER_PREFERENCE = ('h264_nvenc', 'h264_qsv', 'h264_vaapi')
+    
+    # Encoder picked by "auto" per VAAPI device; detection spawns ffmpeg, so it runs once per process
+    _DETECTED_ENCODERS = {}
+    
     def __init__(self, config: Dict):
         self.config = config
         self.video_config = config['video']
@@ -20,13 +101,38 @@ class VideoGenerator:
         self.resolution = self.video_config['resolution']
         self.fps = self.video_config['fps']
         self.width, self.height = map(int, self.resolution.split('x'))
+        
+        # Encoder: libx264 on CPU, or NVENC/QSV/VAAPI to offload encoding to the GPU
+        self.vaapi_device = self.video_config.get('vaapi_device', '/dev/dri/renderD128')
+        self.encoder = self.video_config.get('encoder', 'auto')
+        if self.encoder == 'auto':
+            if self.vaapi_device not in self._DETECTED_ENCODERS:
+                self._DETECTED_ENCODERS[self.vaapi_device] = self._detect_hw_encoder()
+            self.encoder = self._DETECTED_ENCODERS[self.vaapi_device]
+        elif self.encoder not in self.ENCODER_ARGS:
+            raise ValueError(f"Unsupported video encoder: {self.encoder}")
+        
+        # libx264 settings: flat backgrounds with a waveform and text have little
+        # detail, so a fast preset costs almost nothing in size or quality
+        self.x264_preset = self.video_config.get('preset', 'veryfast')
+        self.x264_crf = self.video_config.get('crf', 23)
+        
+        # Videos rendered at the same time; each ffmpeg gets its share of the cores
+        self.workers = max(1, int(self.video_config.get('workers', 2)))
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        
+        # Background choices, resolved on first use and reused for every video
+        self._background_files = None
+        self._gradient_path = None
+        self._background_lock = threading.Lock()
     
     def create_karaoke_video(
         self,
         audio_path: str,
         lyrics_ass_path: str,
         output_path: str,
-        background_path: Optional[str] = None
+        background_path: Optional[str] = None,
+        skip_if_unchanged: bool = False
     ) -> str:
         """
         Create complete karaoke video with all effects
@@ -36,10 +142,15 @@ class VideoGenerator:
             lyrics_ass_path: Path to ASS subtitle file
             output_path: Path for output video
             background_path: Optional custom background image/video
+            skip_if_unchanged: Hash the inputs and skip the encode when the existing
+                video was made from the same ones. Only worth it for re-renders from
+                kept files: the pipeline's instrumental is randomly modified every run
         
         Returns:
             Path to created video file
         """
+        waveform_path = None
+        filter_script_path = None
         try:
             logger.info(f"Creating karaoke video: {Path(output_path).name}")
             
@@ -47,14 +158,44 @@ class VideoGenerator:
             if not background_path:
                 background_path = self._get_background()
             
+            # Static waveform: draw the whole song once instead of on every frame
+            visualizer_config = self.video_config.get('visualizer', {})
+            if visualizer_config.get('type', 'waveform') == 'static_waveform':
+                waveform_path = str(Path(output_path).with_suffix('.wave.png'))
+            
+            # Filter graph goes in a script file rather than on the command line
+            with tempfile.NamedTemporaryFile(
+                'w', prefix=f"fc_{Path(output_path).stem}_", suffix='.txt', delete=False
+            ) as script:
+                filter_script_path = script.name
+            
             # Build FFmpeg command
             ffmpeg_cmd = self._build_ffmpeg_command(
                 audio_path=audio_path,
                 background_path=background_path,
                 lyrics_ass_path=lyrics_ass_path,
-                output_path=output_path
+                output_path=output_path,
+                waveform_path=waveform_path,
+                filter_script_path=filter_script_path
             )
             
+            # Same inputs and settings as the existing video: nothing to encode
+            inputs_hash = None
+            if skip_if_unchanged:
+                inputs_hash = self._inputs_hash(
+                    ffmpeg_cmd, (audio_path, lyrics_ass_path, background_path), filter_script_path
+                )
+            stored_hash = self._read_inputs_hash(output_path)
+            if stored_hash and stored_hash == inputs_hash:
+                logger.info(f"Video is up to date, skipping encode: {Path(output_path).name}")
+                return output_path
+            if stored_hash:
+                # ffmpeg rewrites the file in place; don't let a half-written one keep the old hash
+                os.removexattr(output_path, self.INPUTS_HASH_XATTR)
+            
+            if waveform_path:
+                self._render_waveform_image(audio_path, waveform_path)
+            
             logger.debug(f"FFmpeg command: {' '.join(ffmpeg_cmd)}")
             
             # Execute FFmpeg
@@ -72,6 +213,9 @@ class VideoGenerator:
             if not Path(output_path).exists():
                 raise FileNotFoundError(f"Output video not created: {output_path}")
             
+            if inputs_hash:
+                self._write_inputs_hash(output_path, inputs_hash)
+            
             # Get file size
             file_size_mb = Path(output_path).stat().st_size / (1024 * 1024)
             logger.info(f"Video created successfully: {Path(output_path).name} ({file_size_mb:.2f} MB)")
@@ -81,40 +225,94 @@ class VideoGenerator:
         except Exception as e:
             logger.error(f"Error creating karaoke video: {e}")
             raise
+        
+        finally:
+            for temp_path in (waveform_path, filter_script_path):
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    @staticmethod
+    def _inputs_hash(cmd: list, input_paths: Tuple[str, ...], filter_script_path: Optional[str]) -> str:
+        """SHA-256 of the input files' contents, the filter graph and the ffmpeg arguments"""
+        digest = hashlib.sha256()
+        for path in input_paths:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        
+        if filter_script_path:
+            # The script file name is random; its contents are what matters
+            with open(filter_script_path, 'rb') as f:
+                digest.update(f.read())
+            cmd = [arg for arg in cmd if arg != filter_script_path]
+        
+        digest.update('\0'.join(cmd).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _read_inputs_hash(self, output_path: str) -> Optional[str]:
+        """Inputs hash stored on an existing video, or None (missing file or no xattr support)"""
+        try:
+            return os.getxattr(output_path, self.INPUTS_HASH_XATTR).decode('ascii')
+        except (OSError, AttributeError):
+            return None
+    
+    def _write_inputs_hash(self, output_path: str, inputs_hash: str):
+        """Record the inputs hash on the finished video, where the filesystem allows it"""
+        try:
+            os.setxattr(output_path, self.INPUTS_HASH_XATTR, inputs_hash.encode('ascii'))
+        except (OSError, AttributeError) as e:
+            logger.debug(f"Could not store inputs hash on {output_path}: {e}")
+    
+    def _render_waveform_image(self, audio_path: str, image_path: str):
+        """Render the waveform of the whole audio into one transparent PNG strip"""
+        visualizer_config = self.video_config.get('visualizer', {})
+        vis_color = visualizer_config.get('color', 'cyan')
+        vis_height = visualizer_config.get('height', 200)
+        
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-i', audio_path,
+            '-filter_complex', f"showwavespic=s={self.width}x{vis_height}:colors={vis_color}:scale=sqrt",
+            '-frames:v', '1',
+            image_path
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            logger.error(f"FFmpeg error: {result.stderr}")
+            raise RuntimeError(f"Waveform rendering failed with code {result.returncode}")
     
     def _build_ffmpeg_command(
         self,
         audio_path: str,
         background_path: str,
         lyrics_ass_path: str,
-        output_path: str
+        output_path: str,
+        waveform_path: Optional[str] = None,
+        filter_script_path: Optional[str] = None
     ) -> list:
         """
         Build FFmpeg command with all filters and effects
         
         Filter chain:
         1. Background (image/video/gradient)
-        2. Audio visualizer (waveform/spectrum)
+        2. Audio visualizer (waveform/spectrum, or a prerendered waveform image)
         3. Lyrics overlay (ASS subtitles)
+        
+        With filter_script_path the graph is written to that file and passed
+        with -filter_complex_script, keeping long graphs out of argv.
         """
         
         # Check if background is image or video
         bg_ext = Path(background_path).suffix.lower()
         is_video_bg = bg_ext in ['.mp4', '.mov', '.avi', '.mkv']
         
-        # Get audio duration for loop length
-        duration_cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            audio_path
-        ]
-        
-        try:
-            duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, check=True)
-            duration = float(duration_result.stdout.strip())
-        except:
-            duration = 180  # Fallback to 3 minutes
+        # Get audio duration for loop length, and sample rate to avoid a needless resample
+        duration, sample_rate = _probe_audio(audio_path, os.stat(audio_path).st_mtime_ns)
+        if sample_rate in self.NATIVE_SAMPLE_RATES:
+            sample_rate_args = []
+        else:
+            sample_rate_args = ['-ar', str(self.OUTPUT_SAMPLE_RATE)]
         
         # Build filter complex for video generation
         visualizer_config = self.video_config.get('visualizer', {})
@@ -134,13 +332,17 @@ class VideoGenerator:
         # Background input handling
         if is_video_bg:
             bg_input = ['-stream_loop', '-1', '-i', background_path]
-            bg_filter = f"[1:v]scale={self.width}:{self.height}:force_original_aspect_ratio=increase,crop={self.width}:{self.height}[bg]"
         else:
             bg_input = ['-loop', '1', '-i', background_path]
-            bg_filter = f"[1:v]scale={self.width}:{self.height}[bg]"
+        bg_filter = self._background_filter(background_path, is_video_bg)
         
         # Visualizer filter
-        if vis_type == 'waveform':
+        extra_inputs = []
+        if waveform_path:
+            # Prerendered strip as input 2; optionally slide a playhead across it
+            extra_inputs = ['-loop', '1', '-i', waveform_path]
+            vis_filter = "[2:v]format=rgba[waves];"
+        elif vis_type == 'waveform':
             vis_filter = (
                 f"[0:a]showwaves=s={self.width}x{vis_height}:mode=cline:"
                 f"colors={vis_color}:scale=sqrt[waves];"
@@ -155,65 +357,172 @@ class VideoGenerator:
         overlay_filter = (
             f"[bg][waves]overlay=0:{vis_y}[video_with_waves];"
         )
+        if waveform_path and visualizer_config.get('playhead', True):
+            overlay_filter = (
+                f"[bg][waves]overlay=0:{vis_y}[bg_waves];"
+                f"color=c=white@0.8:s=4x{vis_height}:r={self.fps}[playhead];"
+                f"[bg_waves][playhead]overlay=x='{self.width}*t/{duration}':y={vis_y}[video_with_waves];"
+            )
+        
+        # Hardware encoders may need a device, uploaded frames or another pixel format
+        hw_init, upload_filter, pix_fmt = self._hw_frame_args(self.encoder)
         
         # Complete filter complex
         filter_complex = bg_filter + ";" + vis_filter + overlay_filter + (
-            f"[video_with_waves]ass='{lyrics_ass_path}'[out]"
+            f"[video_with_waves]ass='{lyrics_ass_path}'{upload_filter}[out]"
         )
         
+        if filter_script_path:
+            with open(filter_script_path, 'w', encoding='utf-8') as f:
+                f.write(filter_complex)
+            filter_args = ['-filter_complex_script', filter_script_path]
+        else:
+            filter_args = ['-filter_complex', filter_complex]
+        
         # Build complete FFmpeg command
         cmd = [
             'ffmpeg',
             '-y',  # Overwrite output
+            '-filter_complex_threads', str(self.threads),  # Filter graph threads (same share as the encoder)
+        ] + hw_init + [
             '-i', audio_path,  # Input 0: audio
-        ] + bg_input + [  # Input 1: background
-            '-filter_complex', filter_complex,
+        ] + bg_input + extra_inputs + [  # Input 1: background (input 2: waveform image)
+        ] + filter_args + [
             '-map', '[out]',  # Map filtered video
             '-map', '0:a',  # Map audio
-            '-c:v', 'libx264',  # H.264 codec
-            '-preset', 'medium',  # Encoding preset
-            '-crf', '23',  # Quality (lower = better, 18-28 typical)
+        ] + self._video_codec_args(is_video_bg) + [  # H.264 codec and quality
             '-c:a', 'aac',  # AAC audio codec
             '-b:a', '192k',  # Audio bitrate
-            '-ar', '44100',  # Sample rate
+        ] + sample_rate_args + [  # Sample rate, only when the input needs resampling
             '-t', str(duration),  # Duration
             '-r', str(self.fps),  # Frame rate
-            '-pix_fmt', 'yuv420p',  # Pixel format (widely compatible)
+            '-threads', str(self.threads),  # Encoder threads (cores split between workers)
+            '-movflags', '+faststart',  # moov atom first, so uploads can be processed as they arrive
+        ] + pix_fmt + [
             output_path
         ]
         
         return cmd
     
+    def _background_filter(self, background_path: str, is_video_bg: bool) -> str:
+        """
+        Filter that fits the background to the output size
+        
+        Backgrounds already at the output size pass straight through, and ones
+        with the same aspect ratio only need a (cheap, fast_bilinear) resize.
+        """
+        probe = _probe_video_stream(background_path)
+        if probe:
+            width, height, rate = probe
+            # Videos also need the output frame rate; looped images take it from -r
+            if (width, height) == (self.width, self.height) and (not is_video_bg or rate == Fraction(self.fps)):
+                return "[1:v]null[bg]"
+            if width * self.height == height * self.width:
+                return f"[1:v]scale={self.width}:{self.height}:flags=fast_bilinear[bg]"
+        
+        if is_video_bg:
+            return f"[1:v]scale={self.width}:{self.height}:force_original_aspect_ratio=increase,crop={self.width}:{self.height}[bg]"
+        return f"[1:v]scale={self.width}:{self.height}[bg]"
+    
+    def _detect_hw_encoder(self) -> str:
+        """Pick the first hardware H.264 encoder that works here, else libx264"""
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-encoders'],
+                capture_output=True, text=True, check=True
+            )
+        except Exception:
+            return 'libx264'
+        
+        for encoder in self.HW_ENCODER_PREFERENCE:
+            # Being compiled in doesn't mean the hardware is there: encode one test frame
+            if encoder in result.stdout and self._encoder_works(encoder):
+                logger.info(f"Using hardware video encoder: {encoder}")
+                return encoder
+        
+        return 'libx264'
+    
+    def _encoder_works(self, encoder: str) -> bool:
+        """Check that an encoder can actually encode a frame on this machine"""
+        hw_init, upload_filter, _ = self._hw_frame_args(encoder)
+        cmd = ['ffmpeg', '-hide_banner', '-v', 'error'] + hw_init + [
+            '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+        ] + (['-vf', upload_filter.lstrip(',')] if upload_filter else []) + self.ENCODER_ARGS[encoder] + [
+            '-frames:v', '1', '-f', 'null', '-'
+        ]
+        
+        try:
+            return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+        except Exception:
+            return False
+    
+    def _hw_frame_args(self, encoder: str) -> Tuple[list, str, list]:
+        """Device init arguments, trailing upload filter and pixel format for an encoder"""
+        # VAAPI encodes from GPU surfaces, so upload the finished frames
+        if encoder == 'h264_vaapi':
+            return ['-vaapi_device', self.vaapi_device], ",format=nv12,hwupload", []
+        
+        # QSV takes NV12 input; everything else gets widely compatible yuv420p
+        if encoder == 'h264_qsv':
+            return [], "", ['-pix_fmt', 'nv12']
+        
+        return [], "", ['-pix_fmt', 'yuv420p']
+    
+    def _video_codec_args(self, is_video_bg: bool) -> list:
+        """Encoder arguments for the configured video encoder"""
+        args = list(self.ENCODER_ARGS[self.encoder])
+        
+        if self.encoder == 'libx264':
+            args += ['-preset', self.x264_preset, '-crf', str(self.x264_crf)]
+            
+            # Still backgrounds: skip psychovisual tuning meant for camera footage
+            if not is_video_bg:
+                args += ['-tune', 'stillimage']
+        
+        return args
+    
     def _get_background(self) -> str:
         """
         Get background image/video for karaoke
         Generates gradient or uses existing background
         """
         bg_type = self.video_config.get('background_type', 'gradient')
-        backgrounds_dir = Path(self.paths['backgrounds'])
-        
-        if bg_type == 'gradient':
-            # Generate gradient background
-            gradient_path = backgrounds_dir / 'gradient_bg.png'
-            if not gradient_path.exists():
-                self._create_gradient_background(str(gradient_path))
-            return str(gradient_path)
-        
-        # Look for existing backgrounds
-        background_files = list(backgrounds_dir.glob('*'))
-        background_files = [
-            f for f in background_files 
-            if f.suffix.lower() in ['.png', '.jpg', '.jpeg', '.mp4', '.mov']
-        ]
         
-        if background_files:
-            # Select random background
-            return str(random.choice(background_files))
+        if bg_type != 'gradient':
+            # Look for existing backgrounds (scanned once per generator)
+            if self._background_files is None:
+                self._background_files = self._scan_backgrounds(self.paths['backgrounds'])
+            
+            if self._background_files:
+                # Select random background
+                return random.choice(self._background_files)
+        
+        # Gradient background (configured, or fallback when there are none)
+        return self._get_gradient_background()
+    
+    @staticmethod
+    def _scan_backgrounds(backgrounds_dir: str) -> Tuple[str, ...]:
+        """Paths of the usable background files in a directory"""
+        extensions = {'.png', '.jpg', '.jpeg', '.mp4', '.mov'}
+        try:
+            with os.scandir(backgrounds_dir) as entries:
+                return tuple(
+                    entry.path for entry in entries
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+                )
+        except FileNotFoundError:
+            return ()
+    
+    def _get_gradient_background(self) -> str:
+        """Path to the gradient background, generated the first time it's needed"""
+        with self._background_lock:
+            if self._gradient_path is None:
+                gradient_path = Path(self.paths['backgrounds']) / 'gradient_bg.png'
+                if not gradient_path.exists():
+                    self._create_gradient_background(str(gradient_path))
+                self._gradient_path = str(gradient_path)
         
-        # Fallback: create gradient
-        gradient_path = backgrounds_dir / 'gradient_bg.png'
-        self._create_gradient_background(str(gradient_path))
-        return str(gradient_path)
+        return self._gradient_path
     
     def _create_gradient_background(self, output_path: str):
         """Create a gradient background image using FFmpeg"""
@@ -221,15 +530,15 @@ class VideoGenerator:
             logger.info("Creating gradient background")
             
             # Create attractive gradient with FFmpeg
-            # Using lavfi (Libavfilter virtual input device)
+            # Using lavfi's gradients source (one input, no blend pass),
+            # corner to corner so the result doesn't depend on random endpoints
             cmd = [
                 'ffmpeg', '-y',
                 '-f', 'lavfi',
-                '-i', f'color=c=#1a1a2e:s={self.width}x{self.height}:d=1',
-                '-f', 'lavfi',
-                '-i', f'color=c=#16213e:s={self.width}x{self.height}:d=1',
-                '-filter_complex',
-                '[0:v][1:v]blend=all_mode=average:all_opacity=0.5',
+                '-i', (
+                    f'gradients=s={self.width}x{self.height}:c0=0x1a1a2e:c1=0x16213e:'
+                    f'x0=0:y0=0:x1={self.width}:y1={self.height}:duration=1:rate=1'
+                ),
                 '-frames:v', '1',
                 output_path
             ]
@@ -264,23 +573,21 @@ class VideoGenerator:
                 '-v', 'error',
                 '-select_streams', 'v:0',
                 '-show_entries', 'stream=width,height,duration,bit_rate',
-                '-of', 'json',
+                '-of', 'csv=p=0',
                 video_path
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
             
-            # Parse JSON output
-            import json
-            data = json.loads(result.stdout)
-            
-            if data.get('streams'):
-                stream = data['streams'][0]
+            # One line: width,height,duration,bit_rate (missing values print as N/A)
+            line = result.stdout.strip()
+            if line:
+                width, height, duration, bit_rate = line.split(',')[:4]
                 return {
-                    'width': stream.get('width'),
-                    'height': stream.get('height'),
-                    'duration': float(stream.get('duration', 0)),
-                    'bit_rate': int(stream.get('bit_rate', 0)),
+                    'width': int(width),
+                    'height': int(height),
+                    'duration': float(duration) if duration != 'N/A' else 0.0,
+                    'bit_rate': int(bit_rate) if bit_rate != 'N/A' else 0,
                     'valid': True
                 }
         
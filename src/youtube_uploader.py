@@ -5,17 +5,68 @@ Uses YouTube Data API v3 with OAuth2 authentication
 
 import os
 import pickle
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional
+import httplib2
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 from loguru import logger
 from dotenv import load_dotenv
 
+from utils import get_discovery_doc
+
+
+class _ReadAheadFileUpload(MediaFileUpload):
+    """
+    Resumable file upload that reads the next chunk while the current one is sent
+    
+    googleapiclient asks for each chunk with getbytes() once the previous POST
+    has finished; here that read has already been started in a background thread.
+    """
+    
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._read_ahead = ThreadPoolExecutor(max_workers=1)
+        self._next = None  # (offset, future) of the chunk being read ahead
+        self._read_lock = threading.Lock()
+    
+    def has_stream(self):
+        # Make the client request chunks through getbytes()
+        return False
+    
+    def _read(self, begin: int, length: int) -> bytes:
+        # Seek and read together, so a read-ahead never moves another read's position
+        with self._read_lock:
+            self._fd.seek(begin)
+            return self._fd.read(length)
+    
+    def getbytes(self, begin, length):
+        if self._next and self._next[0] == begin:
+            data = self._next[1].result()
+        else:
+            # First chunk, or the server asked to resume from another offset
+            data = self._read(begin, length)
+        
+        next_begin = begin + len(data)
+        self._next = None
+        if next_begin < self.size():
+            self._next = (next_begin, self._read_ahead.submit(self._read, next_begin, length))
+        return data
+    
+    def close(self):
+        self._read_ahead.shutdown(wait=True)
+        self._fd.close()
+
 
 class YouTubeUploader:
     """
@@ -31,10 +82,21 @@ class YouTubeUploader:
     # YouTube OAuth scopes
     SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
     
+    # Socket timeout for API calls; a large upload chunk on a slow link takes a while
+    HTTP_TIMEOUT = 600
+    
+    # Server errors worth retrying a chunk on
+    RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+    RETRIABLE_EXCEPTIONS = (socket.timeout, ConnectionResetError)
+    MAX_RETRIES = 8
+    
     def __init__(self, config: Dict):
         self.config = config
         self.upload_config = config['upload']
         
+        # Resumable upload chunk size (must be a multiple of 256 KB); each chunk is one request
+        self.chunksize = int(self.upload_config.get('chunksize_mb', 8)) * 1024 * 1024
+        
         load_dotenv()
         
         # OAuth credentials file
@@ -42,6 +104,7 @@ class YouTubeUploader:
         self.token_file = 'token.pickle'
         
         self.youtube = None
+        self._videos = None  # videos() collection, created once per client
         self._authenticate()
     
     def _authenticate(self):
@@ -76,13 +139,23 @@ class YouTubeUploader:
                 creds = flow.run_local_server(port=0)
             
             # Save credentials for next time
-            with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
+            self._save_token(creds)
         
-        # Build YouTube service
-        self.youtube = build('youtube', 'v3', credentials=creds)
+        # Build YouTube service from the bundled discovery document (no HTTP fetch)
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self.HTTP_TIMEOUT))
+        self.youtube = build_from_document(get_discovery_doc('youtube', 'v3'), http=http)
+        self._videos = self.youtube.videos()
         logger.info("YouTube authentication successful")
     
+    def _save_token(self, creds: Credentials):
+        """Write credentials atomically, so a crash mid-write can't corrupt the saved token"""
+        tmp_file = f"{self.token_file}.tmp"
+        with open(tmp_file, 'wb') as token:
+            pickle.dump(creds, token, protocol=5)
+            token.flush()
+            os.fsync(token.fileno())
+        os.replace(tmp_file, self.token_file)
+        
     def upload_video(
         self,
         video_path: str,
@@ -110,6 +183,7 @@ class YouTubeUploader:
             logger.error("YouTube client not authenticated. Cannot upload video.")
             return None
         
+        media = None
         try:
             logger.info(f"Uploading video to YouTube: {title}")
             
@@ -128,42 +202,48 @@ class YouTubeUploader:
             }
             
             # Create media upload
-            media = MediaFileUpload(
+            media = _ReadAheadFileUpload(
                 video_path,
-                chunksize=1024*1024,  # 1MB chunks
+                chunksize=self.chunksize,
                 resumable=True,
                 mimetype='video/mp4'
             )
             
-            # Execute upload request
-            request = self.youtube.videos().insert(
+            # Execute upload request (only the new video's id is read back)
+            request = self._videos.insert(
                 part='snippet,status',
                 body=body,
-                media_body=media
+                media_body=media,
+                fields='id'
             )
             
             response = None
             error = None
             retry = 0
-            max_retries = 3
+            max_retries = self.MAX_RETRIES
             
             while response is None and retry < max_retries:
                 try:
-                    logger.info(f"Uploading... (attempt {retry + 1}/{max_retries})")
                     status, response = request.next_chunk()
                     
                     if status:
                         progress = int(status.progress() * 100)
                         logger.info(f"Upload progress: {progress}%")
+                    continue
                 
                 except HttpError as e:
-                    if e.resp.status in [500, 502, 503, 504]:
-                        # Retry on server errors
-                        error = f"Server error: {e.resp.status}"
-                        retry += 1
-                        logger.warning(f"{error}, retrying...")
-                    else:
+                    if e.resp.status not in self.RETRIABLE_STATUS_CODES:
                         raise
+                    error = f"Server error: {e.resp.status}"
+                except self.RETRIABLE_EXCEPTIONS as e:
+                    error = f"Connection error: {e!r}"
+                
+                # Exponential backoff with jitter before resuming the upload
+                retry += 1
+                if retry < max_retries:
+                    delay = min(32, 2 ** retry) + random.uniform(0, 1)
+                    logger.warning(f"{error}, retrying in {delay:.1f}s ({retry}/{max_retries})...")
+                    time.sleep(delay)
             
             if response:
                 video_id = response['id']
@@ -180,6 +260,10 @@ class YouTubeUploader:
         except Exception as e:
             logger.error(f"Error uploading video: {e}")
             return None
+        
+        finally:
+            if media:
+                media.close()
     
     def upload_karaoke_video(
         self,
@@ -216,8 +216,8 @@ def test_system():
     print()
     
     # Process
-    processor = KaraokeProcessor(config, db)
-    success = processor.process_song(youtube_id)
+    with KaraokeProcessor(config, db) as processor:
+        success = processor.process_song(youtube_id)
     
     print()
     print("="*70)
@@ -229,11 +229,9 @@ def test_system():
         print()
         print(f"📁 Files generated:")
         print(f"   Audio: {song['download_path']}")
-        print(f"   Vocals: {song['vocal_path']}")
-        print(f"   Instrumental: {song['instrumental_path']}")
-        print(f"   Modified: {song['modified_instrumental_path']}")
         print(f"   Lyrics: {song['lyrics_path']}")
         print(f"   VIDEO: {song['video_path']}")
+        print(f"   (Stems are removed from scratch once the video is rendered)")
         print()
         print("📹 You can find your karaoke video at:")
         print(f"   {song['video_path']}")